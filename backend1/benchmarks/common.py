@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+
+def configure_database():
+    """
+    Point the app at the benchmark database before `database` is imported.
+
+    Benchmarks wipe and reseed their database, so they refuse to run
+    unless BENCH_DATABASE_URL is set explicitly.
+    """
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch database, it will be wiped")
+    os.environ["DATABASE_URL"] = url
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def write_results(path: str, results: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    payload = {"revision": git_revision(), "recorded_at": datetime.now().isoformat(timespec="seconds"), **results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, default=str)
+    print(f"Results written to {path}")
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,215 @@
+"""
+HTTP load test replaying a move-in-day traffic mix against the running app.
+
+Usage (from backend1/):
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --duration 60 --concurrency 50
+    python -m benchmarks.loadtest --start-app --duration 60 --compare benchmarks/results/loadtest-baseline.json
+
+The mix can be overridden with --mix '{"room_search": 5, "create_contract": 1}'.
+Every run writes a JSON report with p50/p95/p99 latency, throughput and
+error rates per route, tagged with the git revision, so runs on different
+commits can be compared.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import httpx
+
+from benchmarks.common import load_results, percentile, write_results
+
+DEFAULT_MIX = {
+    "room_search": 30,
+    "list_rooms": 15,
+    "list_contracts": 10,
+    "list_students": 10,
+    "list_invoices": 5,
+    "room_details": 10,
+    "contract_details": 5,
+    "reference_data": 10,
+    "create_contract": 4,
+    "export": 1,
+}
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, seed: int):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.totals = {}
+
+    async def discover(self):
+        """Find the size of each table so requests target existing rows"""
+        for name, path in (("rooms", "/rooms/"), ("students", "/students/"), ("contracts", "/contracts/")):
+            response = await self.client.get(path, params={"page": 1, "size": 1})
+            response.raise_for_status()
+            self.totals[name] = max(1, response.json()["total"])
+
+    async def request(self, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        self.samples[route].append(time.perf_counter() - started)
+        self.statuses[route][status] += 1
+
+    def _page(self, total_name: str, size: int = 20):
+        return {"page": self.rng.randint(1, max(1, self.totals[total_name] // size)), "size": size}
+
+    async def run_scenario(self, name: str):
+        rng = self.rng
+        if name == "room_search":
+            await self.request("GET /rooms/search/by-number", "GET", "/rooms/search/by-number",
+                               params={"room_number": str(rng.randint(1, 9))})
+        elif name == "list_rooms":
+            await self.request("GET /rooms/", "GET", "/rooms/", params=self._page("rooms"))
+        elif name == "list_contracts":
+            await self.request("GET /contracts/", "GET", "/contracts/", params=self._page("contracts"))
+        elif name == "list_students":
+            await self.request("GET /students/", "GET", "/students/", params=self._page("students"))
+        elif name == "list_invoices":
+            await self.request("GET /invoices/", "GET", "/invoices/", params={"page": 1, "size": 20})
+        elif name == "room_details":
+            room_id = rng.randint(1, self.totals["rooms"])
+            await self.request("GET /rooms/{room_id}/details", "GET", f"/rooms/{room_id}/details")
+        elif name == "contract_details":
+            contract_id = rng.randint(1, self.totals["contracts"])
+            await self.request("GET /contracts/{contract_id}/details", "GET", f"/contracts/{contract_id}/details")
+        elif name == "reference_data":
+            path = rng.choice(["/roomtypes/", "/services/"])
+            await self.request(f"GET {path}", "GET", path)
+        elif name == "create_contract":
+            await self.create_contract()
+        elif name == "export":
+            path = rng.choice(["/rooms/export/excel", "/contracts/export/excel"])
+            await self.request(f"GET {path}", "GET", path)
+        else:
+            raise ValueError(f"Unknown scenario {name}")
+
+    async def create_contract(self):
+        today = date.today()
+        await self.request("POST /contracts/", "POST", "/contracts/", json={
+            "StudentID": self.rng.randint(1, self.totals["students"]),
+            "RoomID": self.rng.randint(1, self.totals["rooms"]),
+            "StartDate": today.isoformat(),
+            "EndDate": (today + timedelta(days=150)).isoformat(),
+        })
+
+    async def worker(self, mix: dict, deadline: float):
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        while time.perf_counter() < deadline:
+            await self.run_scenario(self.rng.choices(names, weights)[0])
+
+    async def bursts(self, size: int, interval: float, deadline: float):
+        """Fire `size` concurrent contract creations every `interval` seconds"""
+        while time.perf_counter() + interval < deadline:
+            await asyncio.sleep(interval)
+            await asyncio.gather(*(self.create_contract() for _ in range(size)))
+
+    def report(self, elapsed: float) -> dict:
+        routes = {}
+        for route, durations in sorted(self.samples.items()):
+            durations.sort()
+            statuses = dict(self.statuses[route])
+            errors = sum(count for status, count in statuses.items() if status[0] not in "23")
+            server_errors = sum(count for status, count in statuses.items() if status[0] not in "234")
+            routes[route] = {
+                "requests": len(durations),
+                "throughput_rps": round(len(durations) / elapsed, 2),
+                "p50_ms": round(percentile(durations, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(durations, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(durations, 0.99) * 1000, 2),
+                "error_rate": round(errors / len(durations), 4),
+                "server_error_rate": round(server_errors / len(durations), 4),
+                "statuses": statuses,
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {"elapsed_s": round(elapsed, 2), "requests": total,
+                "throughput_rps": round(total / elapsed, 2), "routes": routes}
+
+
+def print_report(report: dict, baseline: dict = None):
+    print(f"{'route':42} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6}")
+    for route, stats in report["routes"].items():
+        line = (f"{route:42} {stats['requests']:>7} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+                f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['error_rate'] * 100:>6.2f}")
+        previous = (baseline or {}).get("routes", {}).get(route)
+        if previous:
+            line += f"   p95 {previous['p95_ms']:.1f} -> {stats['p95_ms']:.1f} ms"
+        print(line)
+    print(f"Total: {report['requests']} requests, {report['throughput_rps']} req/s")
+
+
+def start_app(port: int):
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)])
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    process.terminate()
+    sys.exit("The app did not become ready in time")
+
+
+async def run(args):
+    mix = {**DEFAULT_MIX, **json.loads(args.mix)} if args.mix else DEFAULT_MIX
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        test = LoadTest(client, args.seed)
+        await test.discover()
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        tasks = [test.worker(mix, deadline) for _ in range(args.concurrency)]
+        if args.burst_size:
+            tasks.append(test.bursts(args.burst_size, args.burst_interval, deadline))
+        await asyncio.gather(*tasks)
+        return test.report(time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a move-in-day traffic mix against the API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--start-app", action="store_true", help="Start uvicorn locally for the run")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--mix", help="JSON object overriding scenario weights")
+    parser.add_argument("--burst-size", type=int, default=20, help="Contract creations per burst, 0 to disable")
+    parser.add_argument("--burst-interval", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmarks/results/loadtest-latest.json")
+    parser.add_argument("--compare", help="Previous report to compare against")
+    args = parser.parse_args()
+
+    process = None
+    if args.start_app:
+        args.base_url = f"http://127.0.0.1:{args.port}"
+        process = start_app(args.port)
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    print_report(report, load_results(args.compare) if args.compare else None)
+    write_results(args.output, {"config": {key: value for key, value in vars(args).items()
+                                           if key not in ("output", "compare")}, **report})
+
+
+if __name__ == "__main__":
+    main()
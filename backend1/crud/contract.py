@@ -1,13 +1,22 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import groupby
+from operator import itemgetter
+
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import func, or_, text, select, update
 from models.contract import Contract
 from models.student import Student
 from models.room import Room
-from models.roomtype import RoomType
 from models.serviceusage import ServiceUsage
-from models.service import Service
-from schemas.contract import ContractCreate
-from utils.room_triggers import check_room_availability
+from schemas.contract import ContractCreate, ContractRenewal, ContractTransfer
+from crud.helper import apply_sort, columns, fetch_rows, fetch_page
+from utils.room_triggers import reserve_room_capacity, room_status_triggers_suspended, update_room_statuses
+from utils.metrics import CONTRACTS_CREATED, CAPACITY_REJECTIONS
+from utils.data_version import bump_version
+from utils.db_retry import retry_on_deadlock
+from utils.revenue_rollup import move_contracts
+from utils import reference_cache
 from fastapi import HTTPException, status
 
 def check_student_active_contract(db: Session, student_id: int) -> bool:
@@ -34,18 +43,94 @@ def get_student_all_contracts(db: Session, student_id: int):
         Contract.StudentID == student_id
     ).order_by(Contract.StartDate.desc()).all()
 
-def create_contract(db: Session, contract: ContractCreate):
-    # Check if student already has an active contract
-    if check_student_active_contract(db, contract.StudentID):
-        active_contract = get_student_active_contract(db, contract.StudentID)
-        room = db.query(Room).filter(Room.RoomID == active_contract.RoomID).first()
+def get_student_contract_statuses(db: Session, student_ids: list[int]):
+    """
+    Contract status of each student, in one joined query.
+
+    Returns a dict keyed by student ID; unknown students are left out.
+    """
+    rows = db.execute(
+        select(
+            Student.StudentID,
+            Student.FullName,
+            Contract.ContractID,
+            Contract.RoomID,
+            Contract.StartDate,
+            Contract.EndDate,
+            Room.RoomNumber
+        ).outerjoin(
+            Contract, Contract.StudentID == Student.StudentID
+        ).outerjoin(
+            Room, Contract.RoomID == Room.RoomID
+        ).where(
+            Student.StudentID.in_(student_ids)
+        ).order_by(Student.StudentID, Contract.StartDate.desc())
+    ).all()
+
+    today = date.today()
+    statuses = {}
+    for row in rows:
+        student_status = statuses.get(row.StudentID)
+        if student_status is None:
+            student_status = statuses[row.StudentID] = {
+                "student_id": row.StudentID,
+                "student_name": row.FullName,
+                "has_active_contract": False,
+                "active_contract": None,
+                "all_contracts": []
+            }
+        if row.ContractID is None:
+            continue
+
+        is_active = row.StartDate <= today <= row.EndDate
+        contract = {
+            "contract_id": row.ContractID,
+            "room_id": row.RoomID,
+            "room_number": row.RoomNumber if row.RoomNumber is not None else "Unknown",
+            "start_date": row.StartDate,
+            "end_date": row.EndDate
+        }
+        if is_active and student_status["active_contract"] is None:
+            student_status["has_active_contract"] = True
+            student_status["active_contract"] = dict(contract)
+        student_status["all_contracts"].append({**contract, "is_active": is_active})
+    return statuses
+
+def _lock_student_without_active_contract(db: Session, student_id: int, action: str):
+    """
+    Lock the student row and make sure they have no active contract.
+
+    Locks are always taken student first, then room, so two writers never
+    wait on each other in opposite order.
+    """
+    if not db.execute(select(Student.StudentID).where(Student.StudentID == student_id).with_for_update()).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Student not found"
+        )
+    active_contract = db.execute(
+        select(Contract.EndDate, Room.RoomNumber).join(
+            Room, Contract.RoomID == Room.RoomID
+        ).where(
+            Contract.StudentID == student_id,
+            Contract.StartDate <= func.curdate(),
+            Contract.EndDate >= func.curdate()
+        ).limit(1).with_for_update(read=True)
+    ).first()
+    if active_contract:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Student already has an active contract in room {room.RoomNumber if room else 'Unknown'} until {active_contract.EndDate}. Cannot create new contract."
+            detail=f"Student already has an active contract in room {active_contract.RoomNumber} until {active_contract.EndDate}. {action}"
         )
-    
-    # Check if room is available before creating contract
-    if not check_room_availability(db, contract.RoomID):
+
+@retry_on_deadlock()
+def create_contract(db: Session, contract: ContractCreate):
+    # Check if student already has an active contract
+    _lock_student_without_active_contract(db, contract.StudentID, "Cannot create new contract.")
+
+    # Reserve a bed: concurrent creations for this room wait here for each other
+    if not reserve_room_capacity(db, contract.RoomID):
+        CAPACITY_REJECTIONS.inc()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Room is full. Cannot add more students to this room."
@@ -53,8 +138,11 @@ def create_contract(db: Session, contract: ContractCreate):
     
     db_contract = Contract(StudentID=contract.StudentID, RoomID=contract.RoomID, StartDate=contract.StartDate, EndDate=contract.EndDate)
     db.add(db_contract)
+    # Room status is maintained by the contract triggers
+    bump_version(db, Contract.__tablename__, Room.__tablename__)
     db.commit()
     db.refresh(db_contract)
+    CONTRACTS_CREATED.inc()
     return db_contract
 
 def get_contract_by_id(db: Session, contract_id: int):
@@ -68,55 +156,62 @@ def get_contracts(db: Session, skip: int = 0, limit: int = 20):
 #     contracts = db.query(Contract).offset(skip).limit(limit).all()
 #     return contracts, total
 
-def get_contracts_with_count(db: Session, skip: int = 0, limit: int = 20):
-    total = db.query(Contract).count()
-
+def _contracts_with_room_number():
     # Query with join to get room number
-    contracts = db.query(Contract, Room.RoomNumber).join(
-        Room, Contract.RoomID == Room.RoomID
-    ).offset(skip).limit(limit).all()
-
-    # Transform the results to include room number
-    result_contracts = []
-    for contract, room_number in contracts:
-        contract_dict = {
-            "ContractID": contract.ContractID,
-            "StudentID": contract.StudentID,
-            "RoomID": contract.RoomID,
-            "StartDate": contract.StartDate,
-            "EndDate": contract.EndDate,
-            "RoomNumber": room_number
-        }
-        result_contracts.append(contract_dict)
+    return select(*columns(Contract), Room.RoomNumber).join(Room, Contract.RoomID == Room.RoomID)
+
+def get_contracts_with_room_number(db: Session):
+    return fetch_rows(db, _contracts_with_room_number())
 
-    return result_contracts, total
+CONTRACT_SORTS = {
+    "ContractID": (Contract.ContractID,),
+    "StartDate": (Contract.StartDate, Contract.ContractID),
+    "EndDate": (Contract.EndDate, Contract.ContractID),
+}
 
+def get_contracts_with_count(db: Session, skip: int = 0, limit: int = 20, student_id: int = None,
+                             room_id: int = None, active_from=None, active_to=None, sort: str = "ContractID"):
+    """Contracts with their room number; active_from/active_to keep those overlapping the range"""
+    stmt = _contracts_with_room_number()
+    if student_id is not None:
+        stmt = stmt.where(Contract.StudentID == student_id)
+    if room_id is not None:
+        stmt = stmt.where(Contract.RoomID == room_id)
+    if active_from is not None:
+        stmt = stmt.where(Contract.EndDate >= active_from)
+    if active_to is not None:
+        stmt = stmt.where(Contract.StartDate <= active_to)
+    return fetch_page(db, apply_sort(stmt, sort, CONTRACT_SORTS), skip, limit)
+
+@retry_on_deadlock()
 def update_contract(db: Session, contract_id: int, contract: ContractCreate):
     db_contract = get_contract_by_id(db, contract_id)
     
     # Check if student is being changed
     if db_contract.StudentID != contract.StudentID:
         # Check if the new student already has an active contract
-        if check_student_active_contract(db, contract.StudentID):
-            active_contract = get_student_active_contract(db, contract.StudentID)
-            room = db.query(Room).filter(Room.RoomID == active_contract.RoomID).first()
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Student already has an active contract in room {room.RoomNumber if room else 'Unknown'} until {active_contract.EndDate}. Cannot assign to this contract."
-            )
+        _lock_student_without_active_contract(db, contract.StudentID, "Cannot assign to this contract.")
     
     # If room is being changed, check if new room is available
     if db_contract.RoomID != contract.RoomID:
-        if not check_room_availability(db, contract.RoomID):
+        if not reserve_room_capacity(db, contract.RoomID):
+            CAPACITY_REJECTIONS.inc()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="New room is full. Cannot move student to this room."
             )
     
+    if db_contract.RoomID != contract.RoomID:
+        room_types = dict(db.execute(
+            select(Room.RoomID, Room.RoomTypeID).where(Room.RoomID.in_((db_contract.RoomID, contract.RoomID)))
+        ).all())
+        move_contracts(db, {contract_id: (room_types.get(db_contract.RoomID), room_types.get(contract.RoomID))})
+
     db_contract.StudentID = contract.StudentID
     db_contract.RoomID = contract.RoomID
     db_contract.StartDate = contract.StartDate
     db_contract.EndDate = contract.EndDate
+    bump_version(db, Contract.__tablename__, Room.__tablename__)
     db.commit()
     db.refresh(db_contract)
     return db_contract
@@ -124,6 +219,7 @@ def update_contract(db: Session, contract_id: int, contract: ContractCreate):
 def delete_contract(db: Session, contract_id: int):
     db_contract = get_contract_by_id(db, contract_id)
     db.delete(db_contract)
+    bump_version(db, Contract.__tablename__, Room.__tablename__)
     db.commit()
     return db_contract
 
@@ -131,51 +227,40 @@ def get_contracts_by_room(db: Session, room_id: int):
     return db.query(Contract).filter(Contract.RoomID == room_id).all()
 
 def get_contract_by_id_with_details(db: Session, contract_id: int):
-    result = db.query(
-        Contract,
-        Student.FullName.label("StudentName"),
-        Room.RoomNumber.label("RoomNumber"),
-        RoomType.RoomTypeName.label("RoomTypeName")
-    ).join(
-        Student, Contract.StudentID == Student.StudentID
-    ).join(
-        Room, Contract.RoomID == Room.RoomID
-    ).join(
-        RoomType, Room.RoomTypeID == RoomType.RoomTypeID
-    ).filter(
-        Contract.ContractID == contract_id
+    contract = db.execute(
+        select(
+            *columns(Contract),
+            Student.FullName.label("StudentName"),
+            Room.RoomNumber.label("RoomNumber"),
+            Room.RoomTypeID.label("RoomTypeID")
+        ).join(
+            Student, Contract.StudentID == Student.StudentID
+        ).join(
+            Room, Contract.RoomID == Room.RoomID
+        ).where(
+            Contract.ContractID == contract_id
+        )
     ).first()
 
-    if not result:
+    if not contract:
         return None
-
-    contract, student_name, room_number, room_type = result
+    roomtype = reference_cache.get_roomtype(db, contract.RoomTypeID)
 
     # Query service usages
-    service_usages = db.query(
-        ServiceUsage.ServiceUsageID,
-        ServiceUsage.ContractID,
-        ServiceUsage.InvoiceID,
-        ServiceUsage.ServiceID,
-        Service.ServiceName,
-        ServiceUsage.Quantity,
-        Service.UnitPrice,
-        ServiceUsage.UsageMonth,
-        ServiceUsage.UsageYear
-    ).join(
-        Service, ServiceUsage.ServiceID == Service.ServiceID
-    ).filter(
-        ServiceUsage.ContractID == contract_id
-    ).all()
+    # Service names and prices come from the reference cache instead of a join
+    service_usages = [
+        (su, reference_cache.get_service(db, su.ServiceID))
+        for su in db.execute(select(*columns(ServiceUsage)).where(ServiceUsage.ContractID == contract_id)).all()
+    ]
 
     # Create response object
     response = {
         "ContractID": contract.ContractID,
         "StudentID": contract.StudentID,
-        "StudentName": student_name,
+        "StudentName": contract.StudentName,
         "RoomID": contract.RoomID,
-        "RoomNumber": room_number,
-        "RoomTypeName": room_type,
+        "RoomNumber": contract.RoomNumber,
+        "RoomTypeName": roomtype.RoomTypeName,
         "StartDate": contract.StartDate,
         "EndDate": contract.EndDate,
         "ServiceUsages": [
@@ -184,14 +269,245 @@ def get_contract_by_id_with_details(db: Session, contract_id: int):
                 "ContractID": su.ContractID,
                 "InvoiceID": su.InvoiceID,
                 "ServiceID": su.ServiceID,
-                "ServiceName": su.ServiceName,
+                "ServiceName": service.ServiceName,
                 "Quantity": su.Quantity,
-                "UnitPrice": su.UnitPrice,
+                "UnitPrice": service.UnitPrice,
                 "UsageMonth": su.UsageMonth,
                 "UsageYear": su.UsageYear
-            } for su in service_usages
+            } for su, service in service_usages
         ]
     }
 
     return response
 
+RENEWAL_CHUNK_SIZE = 1000
+
+def _renewal_conflicts(db: Session, selected, new_end: date):
+    """
+    Check a renewal in one pass over the affected rooms and students.
+
+    A room conflicts when, on any day some selected contract is extended
+    over, it would hold more active contracts than MaxOccupancy. A
+    contract conflicts when its student has another contract during the
+    extended days. Returns the conflicts and the contract IDs they block.
+    """
+    one_day = timedelta(days=1)
+    selected_ids = {contract.ContractID for contract in selected}
+    room_ids = {contract.RoomID for contract in selected}
+    student_ids = {contract.StudentID for contract in selected}
+    window_start = min(contract.EndDate for contract in selected) + one_day
+
+    # Lock the rooms so no contract is added to them until this transaction ends,
+    # in RoomID order like every other multi-room writer
+    max_occupancy = dict(db.execute(
+        select(Room.RoomID, Room.MaxOccupancy).where(Room.RoomID.in_(room_ids)).order_by(Room.RoomID).with_for_update()
+    ).all())
+    others = [
+        contract for contract in db.execute(
+            select(Contract.ContractID, Contract.StudentID, Contract.RoomID, Contract.StartDate, Contract.EndDate).where(
+                Contract.StartDate <= new_end,
+                Contract.EndDate >= window_start,
+                or_(Contract.RoomID.in_(room_ids), Contract.StudentID.in_(student_ids))
+            )
+        ).all()
+        if contract.ContractID not in selected_ids
+    ]
+
+    # Sweep each room's contracts in date order, counting occupants and
+    # how many selected contracts are inside their extension at that point
+    events = defaultdict(list)
+    for contract in selected:
+        events[contract.RoomID] += [
+            (contract.StartDate, 1, 0), (new_end + one_day, -1, 0),
+            (contract.EndDate + one_day, 0, 1), (new_end + one_day, 0, -1),
+        ]
+    for contract in others:
+        if contract.RoomID in room_ids:
+            events[contract.RoomID] += [(contract.StartDate, 1, 0), (contract.EndDate + one_day, -1, 0)]
+
+    conflicts = []
+    blocked = set()
+    full_rooms = set()
+    for room_id, room_events in events.items():
+        room_events.sort(key=itemgetter(0))
+        occupied = extending = 0
+        for day, changes in groupby(room_events, key=itemgetter(0)):
+            for _, occupied_change, extending_change in changes:
+                occupied += occupied_change
+                extending += extending_change
+            if extending and occupied > max_occupancy[room_id]:
+                conflicts.append({"room_id": room_id, "date": day.isoformat(), "occupancy": occupied,
+                                  "max_occupancy": max_occupancy[room_id]})
+                full_rooms.add(room_id)
+                break
+
+    # Selected contracts take part with the range they would have after
+    # the renewal, so two of one student's contracts cannot both be extended
+    by_student = defaultdict(list)
+    for contract in others:
+        by_student[contract.StudentID].append((contract.ContractID, contract.StartDate, contract.EndDate))
+    for contract in selected:
+        by_student[contract.StudentID].append((contract.ContractID, contract.StartDate, new_end))
+    for contract in selected:
+        if contract.RoomID in full_rooms:
+            blocked.add(contract.ContractID)
+        extension_start = contract.EndDate + one_day
+        for other_id, other_start, other_end in by_student[contract.StudentID]:
+            if other_id != contract.ContractID and other_start <= new_end and other_end >= extension_start:
+                conflicts.append({"contract_id": contract.ContractID, "student_id": contract.StudentID,
+                                  "overlaps_contract_id": other_id})
+                blocked.add(contract.ContractID)
+    return conflicts, blocked
+
+@retry_on_deadlock()
+def renew_contracts(db: Session, renewal: ContractRenewal):
+    """
+    Extend the selected contracts to new_end_date with set-based updates.
+
+    Only contracts ending between end_from and the new date are selected;
+    room and room type narrow the selection further. Any conflict rejects
+    the whole renewal unless skip_conflicts is set, in which case the
+    conflicting contracts are left unchanged. Room statuses of the
+    affected rooms are recomputed once at the end.
+    """
+    new_end = renewal.new_end_date
+    stmt = select(
+        Contract.ContractID, Contract.StudentID, Contract.RoomID, Contract.StartDate, Contract.EndDate
+    ).where(Contract.EndDate < new_end, Contract.EndDate >= renewal.end_from)
+    if renewal.end_to is not None:
+        stmt = stmt.where(Contract.EndDate <= renewal.end_to)
+    if renewal.room_id is not None:
+        stmt = stmt.where(Contract.RoomID == renewal.room_id)
+    if renewal.room_type_id is not None:
+        stmt = stmt.join(Room, Contract.RoomID == Room.RoomID).where(Room.RoomTypeID == renewal.room_type_id)
+    selected = db.execute(stmt).all()
+    if not selected:
+        return {"renewed": 0, "skipped": 0, "rooms_updated": 0, "conflicts": []}
+
+    conflicts, blocked = _renewal_conflicts(db, selected, new_end)
+    if conflicts and not renewal.skip_conflicts:
+        CAPACITY_REJECTIONS.inc()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Renewal would overfill rooms or overlap other contracts", "conflicts": conflicts}
+        )
+
+    renewed = [contract for contract in selected if contract.ContractID not in blocked]
+    renewed_ids = [contract.ContractID for contract in renewed]
+    room_ids = {contract.RoomID for contract in renewed}
+    bump_version(db, Contract.__tablename__)
+    with room_status_triggers_suspended(db):
+        for start in range(0, len(renewed_ids), RENEWAL_CHUNK_SIZE):
+            db.execute(
+                update(Contract)
+                .where(Contract.ContractID.in_(renewed_ids[start:start + RENEWAL_CHUNK_SIZE]))
+                .values(EndDate=new_end)
+                .execution_options(synchronize_session=False)
+            )
+        update_room_statuses(db, room_ids)
+    db.commit()
+    return {"renewed": len(renewed_ids), "skipped": len(blocked), "rooms_updated": len(room_ids), "conflicts": conflicts}
+
+@retry_on_deadlock()
+def transfer_contracts(db: Session, transfer: ContractTransfer):
+    """
+    Move contracts to other rooms in one transaction.
+
+    Capacity is checked on the net change per room, so swaps between full
+    rooms and whole-floor reshuffles pass as long as no room ends up above
+    MaxOccupancy. Room statuses are recomputed once per affected room.
+    """
+    targets = {move.contract_id: move.room_id for move in transfer.moves}
+    if len(targets) != len(transfer.moves):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each contract can only be moved once per transfer"
+        )
+
+    current_rooms = dict(db.execute(
+        select(Contract.ContractID, Contract.RoomID).where(Contract.ContractID.in_(targets))
+    ).all())
+    missing = sorted(set(targets) - set(current_rooms))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Contracts not found: {missing}"
+        )
+
+    # Lock every room involved in ascending ID order, before touching any
+    # contract row, the same order the other capacity writers use
+    room_ids = set(current_rooms.values()) | set(targets.values())
+    locked_rooms = db.execute(
+        select(Room.RoomID, Room.MaxOccupancy, Room.RoomTypeID)
+        .where(Room.RoomID.in_(room_ids)).order_by(Room.RoomID).with_for_update()
+    ).all()
+    max_occupancy = {room.RoomID: room.MaxOccupancy for room in locked_rooms}
+    room_types = {room.RoomID: room.RoomTypeID for room in locked_rooms}
+    missing = sorted(room_ids - set(max_occupancy))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Rooms not found: {missing}"
+        )
+
+    today = date.today()
+    contracts = db.execute(
+        select(Contract.ContractID, Contract.RoomID, Contract.StartDate, Contract.EndDate)
+        .where(Contract.ContractID.in_(targets)).with_for_update()
+    ).all()
+    if any(contract.RoomID != current_rooms[contract.ContractID] for contract in contracts):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Contracts were moved by another request, retry the transfer"
+        )
+    occupancy = dict(db.execute(
+        select(Contract.RoomID, func.count()).where(
+            Contract.RoomID.in_(room_ids),
+            Contract.StartDate <= func.curdate(),
+            Contract.EndDate >= func.curdate()
+        ).group_by(Contract.RoomID).with_for_update(read=True)
+    ).all())
+
+    moves = [contract for contract in contracts if targets[contract.ContractID] != contract.RoomID]
+    net_change = defaultdict(int)
+    for contract in moves:
+        # Capacity counts currently active contracts, like check_room_availability
+        if contract.StartDate <= today <= contract.EndDate:
+            net_change[contract.RoomID] -= 1
+            net_change[targets[contract.ContractID]] += 1
+    conflicts = [
+        {"room_id": room_id, "occupancy": occupancy.get(room_id, 0) + change,
+         "max_occupancy": max_occupancy[room_id]}
+        for room_id, change in sorted(net_change.items())
+        if change > 0 and occupancy.get(room_id, 0) + change > max_occupancy[room_id]
+    ]
+    if conflicts:
+        CAPACITY_REJECTIONS.inc()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Transfer would overfill rooms", "conflicts": conflicts}
+        )
+    if not moves:
+        return {"moved": 0, "rooms_updated": 0}
+
+    by_target = defaultdict(list)
+    for contract in moves:
+        by_target[targets[contract.ContractID]].append(contract.ContractID)
+    affected_rooms = {contract.RoomID for contract in moves} | set(by_target)
+    move_contracts(db, {
+        contract.ContractID: (room_types[contract.RoomID], room_types[targets[contract.ContractID]])
+        for contract in moves
+    })
+
+    bump_version(db, Contract.__tablename__)
+    with room_status_triggers_suspended(db):
+        for room_id, contract_ids in by_target.items():
+            db.execute(
+                update(Contract)
+                .where(Contract.ContractID.in_(contract_ids))
+                .values(RoomID=room_id)
+                .execution_options(synchronize_session=False)
+            )
+        update_room_statuses(db, affected_rooms)
+    db.commit()
+    return {"moved": len(moves), "rooms_updated": len(affected_rooms)}
@@ -0,0 +1,42 @@
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+
+def columns(model):
+    """All mapped columns of a model, for read-only projections"""
+    return [getattr(model, column.key) for column in model.__table__.columns]
+
+
+def fetch_rows(db: Session, stmt):
+    """
+    Run a column projection and return plain Row tuples.
+
+    Rows are not added to the identity map and carry no change tracking,
+    so large read-only result sets cost a fraction of full ORM entities.
+    """
+    return db.execute(stmt).all()
+
+
+def fetch_page(db: Session, stmt, skip: int, limit: int):
+    """Return one page of a projection together with the total row count"""
+    total = db.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar_one()
+    rows = db.execute(stmt.offset(skip).limit(limit)).all()
+    return rows, total
+
+
+def apply_sort(stmt, sort: str, allowed: dict):
+    """
+    Order a list query by a whitelisted key, "-Key" for descending.
+
+    `allowed` maps each key to its columns; only keys backed by an index
+    are listed, so pages are read in index order instead of filesorted.
+    """
+    key = sort.removeprefix("-")
+    if key not in allowed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot sort by '{key}'. Allowed: {', '.join(allowed)}"
+        )
+    descending = sort.startswith("-")
+    return stmt.order_by(*(column.desc() if descending else column.asc() for column in allowed[key]))
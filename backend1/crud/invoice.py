@@ -1,11 +1,14 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from crud.helper import apply_sort, columns, fetch_rows, fetch_page
+from utils.data_version import bump_version
 from models.invoice import Invoice
 from schemas.invoice import InvoiceCreate
 from utils.invoice_triggers import recalculate_invoice_amount
 from models.student import Student
 from models.room import Room
 from models.serviceusage import ServiceUsage
-from models.service import Service
+from utils import reference_cache
 
 def create_invoice(db: Session, invoice: InvoiceCreate):
     # Create invoice with initial values
@@ -16,6 +19,7 @@ def create_invoice(db: Session, invoice: InvoiceCreate):
     # Recalculate the total amount based on service usage
     recalculate_invoice_amount(db, db_invoice.InvoiceID)
     
+    bump_version(db, Invoice.__tablename__)
     db.commit()
     db.refresh(db_invoice)
     return db_invoice
@@ -24,12 +28,29 @@ def get_invoice_by_id(db: Session, invoice_id: int):
     return db.query(Invoice).filter(Invoice.InvoiceID == invoice_id).first()
 
 def get_invoices(db: Session):
-    return db.query(Invoice).all()
+    return fetch_rows(db, select(*columns(Invoice)))
 
-def get_invoices_with_count(db: Session, skip: int = 0, limit: int = 20):
-    total = db.query(Invoice).count()
-    invoices = db.query(Invoice).offset(skip).limit(limit).all()
-    return invoices, total
+INVOICE_SORTS = {
+    "InvoiceID": (Invoice.InvoiceID,),
+    "CreatedDate": (Invoice.CreatedDate, Invoice.InvoiceID),
+    "DueDate": (Invoice.DueDate, Invoice.InvoiceID),
+}
+
+def get_invoices_with_count(db: Session, skip: int = 0, limit: int = 20, overdue: bool = None,
+                            due_from=None, due_to=None, created_from=None, created_to=None,
+                            sort: str = "InvoiceID"):
+    stmt = select(*columns(Invoice))
+    if overdue is not None:
+        stmt = stmt.where(Invoice.DueDate < func.curdate() if overdue else Invoice.DueDate >= func.curdate())
+    if due_from is not None:
+        stmt = stmt.where(Invoice.DueDate >= due_from)
+    if due_to is not None:
+        stmt = stmt.where(Invoice.DueDate <= due_to)
+    if created_from is not None:
+        stmt = stmt.where(Invoice.CreatedDate >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Invoice.CreatedDate <= created_to)
+    return fetch_page(db, apply_sort(stmt, sort, INVOICE_SORTS), skip, limit)
 
 def update_invoice(db: Session, invoice_id: int, invoice: InvoiceCreate):
     db_invoice = get_invoice_by_id(db, invoice_id)
@@ -41,6 +62,7 @@ def update_invoice(db: Session, invoice_id: int, invoice: InvoiceCreate):
     # Recalculate the total amount if ServiceUsageID changed
     recalculate_invoice_amount(db, invoice_id)
     
+    bump_version(db, Invoice.__tablename__)
     db.commit()
     db.refresh(db_invoice)
     return db_invoice
@@ -48,37 +70,24 @@ def update_invoice(db: Session, invoice_id: int, invoice: InvoiceCreate):
 def delete_invoice(db: Session, invoice_id: int):
     db_invoice = get_invoice_by_id(db, invoice_id)
     db.delete(db_invoice)
+    bump_version(db, Invoice.__tablename__)
     db.commit()
     return db_invoice
 
 def get_invoice_by_id_with_details(db: Session, invoice_id: int):
-    result = db.query(
-        Invoice,
-    ).filter(
-        Invoice.InvoiceID == invoice_id
+    invoice = db.execute(
+        select(*columns(Invoice)).where(Invoice.InvoiceID == invoice_id)
     ).first()
 
-    if not result:
+    if not invoice:
         return None
 
-    invoice = result
-
     # Query service usages
-    service_usages = db.query(
-        ServiceUsage.ServiceUsageID,
-        ServiceUsage.ContractID,
-        ServiceUsage.InvoiceID,
-        ServiceUsage.ServiceID,
-        Service.ServiceName,
-        ServiceUsage.Quantity,
-        Service.UnitPrice,
-        ServiceUsage.UsageMonth,
-        ServiceUsage.UsageYear
-    ).join(
-        Service, ServiceUsage.ServiceID == Service.ServiceID
-    ).filter(
-        ServiceUsage.InvoiceID == invoice_id
-    ).all()
+    # Service names and prices come from the reference cache instead of a join
+    service_usages = [
+        (su, reference_cache.get_service(db, su.ServiceID))
+        for su in db.execute(select(*columns(ServiceUsage)).where(ServiceUsage.InvoiceID == invoice_id)).all()
+    ]
 
     # Create response object
     response = {
@@ -92,12 +101,12 @@ def get_invoice_by_id_with_details(db: Session, invoice_id: int):
                 "ContractID": su.ContractID,
                 "InvoiceID": su.InvoiceID,
                 "ServiceID": su.ServiceID,
-                "ServiceName": su.ServiceName,
+                "ServiceName": service.ServiceName,
                 "Quantity": su.Quantity,
-                "UnitPrice": su.UnitPrice,
+                "UnitPrice": service.UnitPrice,
                 "UsageMonth": su.UsageMonth,
                 "UsageYear": su.UsageYear
-            } for su in service_usages
+            } for su, service in service_usages
         ]
     }
 
@@ -0,0 +1,123 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from fastapi import HTTPException, status
+from models.revenuerollup import RevenueRollup
+from models.roomoccupancysnapshot import RoomOccupancySnapshot
+from models.roomtypeoccupancysnapshot import RoomTypeOccupancySnapshot
+from utils import reference_cache
+
+# group_by name -> rollup key columns
+REVENUE_DIMENSIONS = {
+    "year": (RevenueRollup.UsageYear,),
+    "month": (RevenueRollup.UsageYear, RevenueRollup.UsageMonth),
+    "service": (RevenueRollup.ServiceID,),
+    "room_type": (RevenueRollup.RoomTypeID,),
+}
+
+
+def _period(value: str) -> int:
+    year, month = value.split("-")
+    return int(year) * 100 + int(month)
+
+
+def get_revenue(db: Session, group_by: str = "month", period_from: str = None, period_to: str = None,
+                service_id: int = None, room_type_id: int = None):
+    """
+    Usage quantity and amount from the revenue rollup, summed over the
+    dimensions not in `group_by` (comma separated REVENUE_DIMENSIONS keys).
+    Periods are inclusive "YYYY-MM" bounds.
+    """
+    names = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in names if name not in REVENUE_DIMENSIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot group by {', '.join(unknown)}. Allowed: {', '.join(REVENUE_DIMENSIONS)}"
+        )
+    keys = list(dict.fromkeys(key for name in names for key in REVENUE_DIMENSIONS[name]))
+
+    stmt = select(*keys, func.sum(RevenueRollup.Quantity).label("Quantity"),
+                  func.sum(RevenueRollup.Amount).label("Amount"))
+    period = RevenueRollup.UsageYear * 100 + RevenueRollup.UsageMonth
+    if period_from is not None:
+        stmt = stmt.where(period >= _period(period_from))
+    if period_to is not None:
+        stmt = stmt.where(period <= _period(period_to))
+    if service_id is not None:
+        stmt = stmt.where(RevenueRollup.ServiceID == service_id)
+    if room_type_id is not None:
+        stmt = stmt.where(RevenueRollup.RoomTypeID == room_type_id)
+    if keys:
+        stmt = stmt.group_by(*keys).order_by(*keys)
+
+    rows = []
+    for row in db.execute(stmt):
+        item = row._asdict()
+        if "ServiceID" in item:
+            service = reference_cache.get_service(db, item["ServiceID"])
+            item["ServiceName"] = service.ServiceName if service else None
+        if "RoomTypeID" in item:
+            room_type = reference_cache.get_roomtype(db, item["RoomTypeID"])
+            item["RoomTypeName"] = room_type.RoomTypeName if room_type else None
+        item["Quantity"] = item["Quantity"] or 0
+        item["Amount"] = item["Amount"] or 0
+        rows.append(item)
+    return {"group_by": names, "rows": rows}
+
+
+# Longest date range one occupancy request may cover
+MAX_OCCUPANCY_DAYS = 1096
+
+
+def get_occupancy(db: Session, date_from, date_to, group_by: str = "total", room_type_id: int = None,
+                  room_id: int = None):
+    """
+    Daily occupancy between two dates (inclusive) from the snapshot tables,
+    per day for the whole dormitory ("total"), per room type or per room.
+    Days without a snapshot are missing from the result.
+    """
+    if date_to < date_from or (date_to - date_from).days >= MAX_OCCUPANCY_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"date_to must be on or after date_from and at most {MAX_OCCUPANCY_DAYS} days later"
+        )
+
+    if group_by == "room":
+        snapshot = RoomOccupancySnapshot
+        stmt = select(snapshot.SnapshotDate, snapshot.RoomID, snapshot.RoomTypeID,
+                      snapshot.MaxOccupancy.label("Beds"), snapshot.Occupants)
+        if room_id is not None:
+            stmt = stmt.where(snapshot.RoomID == room_id)
+        stmt = stmt.order_by(snapshot.RoomID, snapshot.SnapshotDate)
+    elif group_by in ("total", "room_type"):
+        if room_id is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="room_id requires group_by=room"
+            )
+        snapshot = RoomTypeOccupancySnapshot
+        if group_by == "room_type":
+            stmt = select(snapshot.SnapshotDate, snapshot.RoomTypeID, snapshot.Beds, snapshot.Occupants)
+            stmt = stmt.order_by(snapshot.RoomTypeID, snapshot.SnapshotDate)
+        else:
+            stmt = select(snapshot.SnapshotDate, func.sum(snapshot.Beds).label("Beds"),
+                          func.sum(snapshot.Occupants).label("Occupants"))
+            stmt = stmt.group_by(snapshot.SnapshotDate).order_by(snapshot.SnapshotDate)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="group_by must be one of: total, room_type, room"
+        )
+
+    stmt = stmt.where(snapshot.SnapshotDate >= date_from, snapshot.SnapshotDate <= date_to)
+    if room_type_id is not None:
+        stmt = stmt.where(snapshot.RoomTypeID == room_type_id)
+
+    rows = []
+    for row in db.execute(stmt):
+        item = row._asdict()
+        item["Beds"] = int(item["Beds"] or 0)
+        item["Occupants"] = int(item["Occupants"] or 0)
+        item["OccupancyRate"] = round(item["Occupants"] / item["Beds"], 4) if item["Beds"] else 0.0
+        rows.append(item)
+    return {"group_by": group_by, "rows": rows}
@@ -1,18 +1,25 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from fastapi import HTTPException, status
 from datetime import date
 
 from crud.contract import get_contracts_by_room
+from crud.helper import apply_sort, columns, fetch_rows, fetch_page
 from models.contract import Contract
 from models.room import Room
 from models.student import Student
 from schemas.room import RoomCreate
 from utils.room_triggers import update_room_status_after_orm_change
+from utils.data_version import bump_version
+from utils.room_index import get_room_index
+from utils.archive import archive_view
+from utils.revenue_rollup import move_contracts
 
 
 def create_room(db: Session, room: RoomCreate):
     db_room = Room(RoomTypeID=room.RoomTypeID, RoomNumber=room.RoomNumber, MaxOccupancy=room.MaxOccupancy, Status="Available")
     db.add(db_room)
+    bump_version(db, Room.__tablename__)
     db.commit()
     db.refresh(db_room)
     return db_room
@@ -36,18 +43,26 @@ def update_room(db: Session, room_id: int, room: RoomCreate):
                 detail=f"Cannot set MaxOccupancy ({room.MaxOccupancy}) smaller than current occupancy ({current_occupancy})"
             )
     
+    if room.RoomTypeID != db_room.RoomTypeID:
+        contracts = archive_view(Contract)
+        contract_ids = db.execute(select(contracts.c.ContractID).where(contracts.c.RoomID == room_id)).scalars()
+        move_contracts(db, {contract_id: (db_room.RoomTypeID, room.RoomTypeID) for contract_id in contract_ids})
+
     db_room.RoomTypeID = room.RoomTypeID
     db_room.RoomNumber = room.RoomNumber
     db_room.MaxOccupancy = room.MaxOccupancy
     #db_room.Status = room.Status
+    db.flush()
+    update_room_status_after_orm_change(db, room_id)
+    bump_version(db, Room.__tablename__)
     db.commit()
     db.refresh(db_room)
-    update_room_status_after_orm_change(db, room_id)
     return db_room
 
 def delete_room(db: Session, room_id: int):
     db_room = get_room_by_id(db, room_id)
     db.delete(db_room)
+    bump_version(db, Room.__tablename__)
     db.commit()
     return db_room
 
@@ -63,7 +78,7 @@ def get_room_by_id(db: Session, room_id: int):
 
 def get_room_details_by_id(db: Session, room_id: int):
     # Get room basic information
-    room = db.query(Room).filter(Room.RoomID == room_id).first()
+    room = db.execute(select(*columns(Room)).where(Room.RoomID == room_id)).first()
 
     if not room:
         raise HTTPException(
@@ -103,18 +118,29 @@ def get_room_details_by_id(db: Session, room_id: int):
     return room_details
 
 def get_rooms(db: Session):
-    return db.query(Room).all()
+    return fetch_rows(db, select(*columns(Room)))
 
-def get_rooms_with_count(db: Session, skip: int = 0, limit: int = 20):
-    total = db.query(Room).count()
-    rooms = db.query(Room).offset(skip).limit(limit).all()
-    return rooms, total
+ROOM_SORTS = {
+    "RoomID": (Room.RoomID,),
+    "RoomNumber": (Room.RoomNumber, Room.RoomID),
+}
+
+def get_rooms_with_count(db: Session, skip: int = 0, limit: int = 20, room_type_id: int = None,
+                         room_status: str = None, floor: int = None, sort: str = "RoomID"):
+    stmt = select(*columns(Room))
+    if room_type_id is not None:
+        stmt = stmt.where(Room.RoomTypeID == room_type_id)
+    if room_status is not None:
+        stmt = stmt.where(Room.Status == room_status)
+    if floor is not None:
+        # Room numbers are the floor followed by a two digit room index
+        stmt = stmt.where(Room.RoomNumber.like(f"{floor}__"))
+    return fetch_page(db, apply_sort(stmt, sort, ROOM_SORTS), skip, limit)
 
 def search_rooms_by_number(db: Session, room_number: str):
     """Search for rooms by room number (partial match)"""
-    query = db.query(Room.RoomID, Room.RoomNumber)
-    
-    if room_number:
-        query = query.filter(Room.RoomNumber.ilike(f"%{room_number}%"))
-        
-    return query.all()
+    return get_room_index(db).search(room_number)
+
+def suggest_rooms(db: Session, q: str, limit: int = 10, room_type_id: int = None, room_status: str = None):
+    """Ranked room number completions, optionally restricted to a room type or status"""
+    return get_room_index(db).search(q, limit, room_type_id, room_status)
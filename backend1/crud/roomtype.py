@@ -1,11 +1,15 @@
 from sqlalchemy.orm import Session
+from utils.data_version import bump_version
+from utils import reference_cache
 from models.roomtype import RoomType
 from schemas.roomtype import RoomTypeCreate
 
 def create_roomtype(db: Session, roomtype: RoomTypeCreate):
     db_roomtype = RoomType(RoomTypeName=roomtype.RoomTypeName, RentPrice=roomtype.RentPrice)
     db.add(db_roomtype)
+    bump_version(db, RoomType.__tablename__)
     db.commit()
+    reference_cache.invalidate(RoomType.__tablename__)
     db.refresh(db_roomtype)
     return db_roomtype
 
@@ -13,17 +17,23 @@ def get_roomtype_by_id(db: Session, roomtype_id: int):
     return db.query(RoomType).filter(RoomType.RoomTypeID == roomtype_id).first()
 
 def get_roomtypes(db: Session):
-    return db.query(RoomType).all()
+    return reference_cache.get_roomtypes(db)
 
 def update_roomtype(db: Session, roomtype_id: int, roomtype: RoomTypeCreate):
     db_roomtype = get_roomtype_by_id(db, roomtype_id)
     db_roomtype.RoomTypeName = roomtype.RoomTypeName
     db_roomtype.RentPrice = roomtype.RentPrice
+    bump_version(db, RoomType.__tablename__)
     db.commit()
+    reference_cache.invalidate(RoomType.__tablename__)
     db.refresh(db_roomtype)
     return db_roomtype
 
 def delete_roomtype(db: Session, roomtype_id: int):
     db_roomtype = get_roomtype_by_id(db, roomtype_id)
     db.delete(db_roomtype)
-    
+    bump_version(db, RoomType.__tablename__)
+    db.commit()
+    reference_cache.invalidate(RoomType.__tablename__)
+    return db_roomtype
+
@@ -1,11 +1,16 @@
 from sqlalchemy.orm import Session
+from utils.data_version import bump_version
+from utils import reference_cache
+from utils.revenue_rollup import reprice_service
 from models.service import Service
 from schemas.service import ServiceCreate
 
 def create_service(db: Session, service: ServiceCreate):
     db_service = Service(ServiceName=service.ServiceName, UnitPrice=service.UnitPrice)
     db.add(db_service)
+    bump_version(db, Service.__tablename__)
     db.commit()
+    reference_cache.invalidate(Service.__tablename__)
     db.refresh(db_service)
     return db_service
 
@@ -13,18 +18,23 @@ def get_service_by_id(db: Session, service_id: int):
     return db.query(Service).filter(Service.ServiceID == service_id).first()
 
 def get_services(db: Session):
-    return db.query(Service).all()
+    return reference_cache.get_services(db)
 
 def update_service(db: Session, service_id: int, service: ServiceCreate):
     db_service = get_service_by_id(db, service_id)
+    reprice_service(db, service_id, db_service.UnitPrice, service.UnitPrice)
     db_service.ServiceName = service.ServiceName
     db_service.UnitPrice = service.UnitPrice
+    bump_version(db, Service.__tablename__)
     db.commit()
+    reference_cache.invalidate(Service.__tablename__)
     db.refresh(db_service)
     return db_service
 
 def delete_service(db: Session, service_id: int):
     db_service = get_service_by_id(db, service_id)
     db.delete(db_service)
+    bump_version(db, Service.__tablename__)
     db.commit()
+    reference_cache.invalidate(Service.__tablename__)
     return db_service
\ No newline at end of file
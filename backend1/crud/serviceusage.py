@@ -1,9 +1,12 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import select
+from crud.helper import apply_sort, columns, fetch_rows, fetch_page
 from models.serviceusage import ServiceUsage
 from models.invoice import Invoice
 from schemas.serviceusage import ServiceUsageCreate
 from utils.invoice_triggers import recalculate_invoice_amount
+from utils.data_version import bump_version
+from utils.revenue_rollup import apply_deltas, rebuild_rollup, usage_deltas
 
 def create_serviceusage(db: Session, serviceusage: ServiceUsageCreate):
     db_serviceusage = ServiceUsage(ContractID=serviceusage.ContractID, InvoiceID=serviceusage.InvoiceID, ServiceID=serviceusage.ServiceID, Quantity=serviceusage.Quantity, UsageMonth=serviceusage.UsageMonth, UsageYear=serviceusage.UsageYear)
@@ -13,12 +16,15 @@ def create_serviceusage(db: Session, serviceusage: ServiceUsageCreate):
     
     db.add(db_serviceusage)
     db.flush()
+    apply_deltas(db, usage_deltas(db, db_serviceusage))
 
     invoice_id = serviceusage.InvoiceID
 
     if invoice_id:
         recalculate_invoice_amount(db, invoice_id)
+        bump_version(db, Invoice.__tablename__)
 
+    bump_version(db, ServiceUsage.__tablename__)
     db.commit()
     db.refresh(db_serviceusage)
     return db_serviceusage
@@ -27,16 +33,33 @@ def get_serviceusage_by_id(db: Session, serviceusage_id: int):
     return db.query(ServiceUsage).filter(ServiceUsage.ServiceUsageID == serviceusage_id).first()
 
 def get_serviceusages(db: Session):
-    return db.query(ServiceUsage).all()
+    return fetch_rows(db, select(*columns(ServiceUsage)))
 
-def get_serviceusages_with_count(db: Session, skip: int = 0, limit: int = 20):
+SERVICEUSAGE_SORTS = {
+    "ServiceUsageID": (ServiceUsage.ServiceUsageID,),
+    "UsagePeriod": (ServiceUsage.UsageYear, ServiceUsage.UsageMonth, ServiceUsage.ServiceUsageID),
+}
+
+def get_serviceusages_with_count(db: Session, skip: int = 0, limit: int = 20, contract_id: int = None,
+                                 invoice_id: int = None, service_id: int = None, usage_year: int = None,
+                                 usage_month: int = None, sort: str = "ServiceUsageID"):
     """Get paginated service usages with total count"""
-    total = db.query(ServiceUsage).count()
-    serviceusages = db.query(ServiceUsage).offset(skip).limit(limit).all()
-    return serviceusages, total
+    stmt = select(*columns(ServiceUsage))
+    if contract_id is not None:
+        stmt = stmt.where(ServiceUsage.ContractID == contract_id)
+    if invoice_id is not None:
+        stmt = stmt.where(ServiceUsage.InvoiceID == invoice_id)
+    if service_id is not None:
+        stmt = stmt.where(ServiceUsage.ServiceID == service_id)
+    if usage_year is not None:
+        stmt = stmt.where(ServiceUsage.UsageYear == usage_year)
+    if usage_month is not None:
+        stmt = stmt.where(ServiceUsage.UsageMonth == usage_month)
+    return fetch_page(db, apply_sort(stmt, sort, SERVICEUSAGE_SORTS), skip, limit)
 
 def update_serviceusage(db: Session, serviceusage_id: int, serviceusage: ServiceUsageCreate):
     db_serviceusage = get_serviceusage_by_id(db, serviceusage_id)
+    deltas = usage_deltas(db, db_serviceusage, -1)
     db_serviceusage.ContractID = serviceusage.ContractID
     db_serviceusage.ServiceID = serviceusage.ServiceID
     db_serviceusage.Quantity = serviceusage.Quantity
@@ -48,11 +71,14 @@ def update_serviceusage(db: Session, serviceusage_id: int, serviceusage: Service
     invoice_id = db_serviceusage.InvoiceID
 
     db.flush()  # Đảm bảo thay đổi đã được ghi vào session
+    apply_deltas(db, usage_deltas(db, db_serviceusage, 1, deltas))
 
     # Nếu có InvoiceID thì cập nhật lại tổng tiền hóa đơn
     if invoice_id:
         recalculate_invoice_amount(db, invoice_id)
+        bump_version(db, Invoice.__tablename__)
 
+    bump_version(db, ServiceUsage.__tablename__)
     db.commit()
     db.refresh(db_serviceusage)
     return db_serviceusage
@@ -61,16 +87,21 @@ def delete_serviceusage(db: Session, serviceusage_id: int):
     db_serviceusage = get_serviceusage_by_id(db, serviceusage_id)
 
     invoice_id = db_serviceusage.InvoiceID
+    apply_deltas(db, usage_deltas(db, db_serviceusage, -1))
     db.delete(db_serviceusage)
     db.flush()
 
     if invoice_id:
         recalculate_invoice_amount(db, invoice_id)
+        bump_version(db, Invoice.__tablename__)
 
+    bump_version(db, ServiceUsage.__tablename__)
     db.commit()
     return db_serviceusage
 
 def delete_all_serviceusages(db: Session):
     db.query(ServiceUsage).delete()
+    rebuild_rollup(db)
+    bump_version(db, ServiceUsage.__tablename__)
     db.commit()
     return {"message": "All service usages deleted successfully"}
\ No newline at end of file
@@ -1,31 +1,57 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import select
+from crud.helper import apply_sort, columns, fetch_rows, fetch_page
+from utils.data_version import bump_version
+from utils.student_index import search_students as search_student_index, student_changed
 from models.student import Student
 from schemas.student import StudentCreate
 
 def create_student(db: Session, student: StudentCreate):
     db_student = Student(FullName=student.FullName, Gender=student.Gender, PhoneNumber=student.PhoneNumber)
     db.add(db_student)
+    bump_version(db, Student.__tablename__)
     db.commit()
     db.refresh(db_student)
+    student_changed(db_student.StudentID, db_student)
     return db_student
 
 def get_student_by_id(db: Session, student_id: int):
     return db.query(Student).filter(Student.StudentID == student_id).first()
 
 def get_students(db: Session):
-    return db.query(Student).all()
+    return fetch_rows(db, select(*columns(Student)))
 
-def get_students_with_count(db: Session, skip: int = 0, limit: int = 20):
-    total = db.query(Student).count()
-    students = db.query(Student).offset(skip).limit(limit).all()
-    return students, total
+STUDENT_SORTS = {
+    "StudentID": (Student.StudentID,),
+    "FullName": (Student.FullName, Student.StudentID),
+}
+
+def get_students_with_count(db: Session, skip: int = 0, limit: int = 20, gender: str = None,
+                            sort: str = "StudentID"):
+    stmt = select(*columns(Student))
+    if gender is not None:
+        stmt = stmt.where(Student.Gender == gender)
+    return fetch_page(db, apply_sort(stmt, sort, STUDENT_SORTS), skip, limit)
+
+def search_students(q: str, limit: int = 20):
+    """Ranked matches on accent-insensitive name tokens or phone-number prefix"""
+    return search_student_index(q, limit)
 
 def update_student(db: Session, student_id: int, student: StudentCreate):
     db_student = get_student_by_id(db, student_id)
     db_student.FullName = student.FullName
+    db_student.Gender = student.Gender
+    db_student.PhoneNumber = student.PhoneNumber
+    bump_version(db, Student.__tablename__)
+    db.commit()
+    db.refresh(db_student)
+    student_changed(db_student.StudentID, db_student)
+    return db_student
 
 def delete_student(db: Session, student_id: int):
     db_student = get_student_by_id(db, student_id)
     db.delete(db_student)
+    bump_version(db, Student.__tablename__)
     db.commit()
+    student_changed(student_id)
     return db_student
@@ -1,21 +1,24 @@
 from sqlalchemy.orm import Session
 from models.user import User
 from schemas.user import UserLogin
+from utils.security import hash_password
 
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.Username == username).first()
 
-def create_user(db: Session, username: str, password: str):
-    db_user = User(Username=username, Password=password)
+def add_user(db: Session, username: str, password_hash: str):
+    db_user = User(Username=username, Password=password_hash)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user_by_username(db, username)
-    if not user:
-        return None
-    if user.Password != password:  # Simple password comparison
-        return None
-    return user 
\ No newline at end of file
+def create_user(db: Session, username: str, password: str):
+    return add_user(db, username, hash_password(password))
+
+def set_password_hash(db: Session, user: User, password_hash: str):
+    """Store an upgraded hash, e.g. for a password saved before hashing was added"""
+    user.Password = password_hash
+    db.commit()
+    db.refresh(user)
+    return user
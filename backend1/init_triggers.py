@@ -1,21 +1,128 @@
-from database import SessionLocal
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SessionLocal, Base, engine
+# Import every model so Base.metadata knows all tables before create_all
+from models import contract, invoice, room, roomtype, service, serviceusage, student, user  # noqa: F401
+from models import contracthistory, invoicehistory, revenuerollup, serviceusagehistory  # noqa: F401
+from models import revokedtoken, roomoccupancysnapshot, roomtypeoccupancysnapshot  # noqa: F401
+from models.bootstrap import BootstrapVersion
+from models.dataversion import DataVersion
+from utils.archive import create_archive_views
+from utils.revenue_rollup import rebuild_rollup
 from utils.room_triggers import create_room_triggers, update_all_room_statuses
 
-def initialize_triggers():
-    """Initialize room triggers and update all room statuses"""
+# Bump these whenever the table definitions or the trigger bodies change,
+# so that the next start re-applies them once.
+SCHEMA_VERSION = "7"
+TRIGGER_VERSION = "2"
+
+BOOTSTRAP_LOCK_NAME = "dorm_management_bootstrap"
+BOOTSTRAP_LOCK_TIMEOUT = 60
+
+
+def _expected_versions():
+    return {"schema": SCHEMA_VERSION, "triggers": TRIGGER_VERSION}
+
+
+def _applied_versions(db):
+    """Read the recorded versions, or an empty dict if the table does not exist yet"""
+    try:
+        rows = db.query(BootstrapVersion).all()
+    except SQLAlchemyError:
+        db.rollback()
+        return {}
+    return {row.Component: row.Version for row in rows}
+
+
+def _record_version(db, component: str, version: str):
+    row = db.query(BootstrapVersion).filter(BootstrapVersion.Component == component).first()
+    if row:
+        row.Version = version
+        row.AppliedAt = datetime.now()
+    else:
+        db.add(BootstrapVersion(Component=component, Version=version, AppliedAt=datetime.now()))
+    db.commit()
+
+
+def _ensure_data_versions(db):
+    """Create a version row per table up front so writers only ever UPDATE it"""
+    existing = {table for table, in db.query(DataVersion.TableName).all()}
+    for table in Base.metadata.tables:
+        if table not in existing:
+            db.add(DataVersion(TableName=table, Version=0))
+    db.commit()
+
+
+def _ensure_indexes():
+    """create_all skips existing tables, so add indexes declared since they were created"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def run_bootstrap(force: bool = False):
+    """
+    Create the schema and the room triggers once per version.
+
+    The common case (everything already applied) costs a single SELECT.
+    Otherwise a MySQL advisory lock makes sure only one process does the
+    work while the others wait and then find the versions up to date.
+    """
+    expected = _expected_versions()
+
     db = SessionLocal()
     try:
-        print("Setting up room triggers...")
-        create_room_triggers(db)
-        
-        print("Updating all room statuses...")
-        update_all_room_statuses(db)
-        
-        print("Room management system initialized successfully!")
-    except Exception as e:
-        print(f"Error initializing triggers: {e}")
+        if not force and _applied_versions(db) == expected:
+            return
     finally:
         db.close()
 
+    # GET_LOCK is bound to the connection, so hold it on a dedicated one
+    with engine.connect() as lock_conn:
+        acquired = lock_conn.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {"name": BOOTSTRAP_LOCK_NAME, "timeout": BOOTSTRAP_LOCK_TIMEOUT}
+        ).scalar()
+        if acquired != 1:
+            print("Could not acquire bootstrap lock, skipping startup bootstrap")
+            return
+
+        try:
+            db = SessionLocal()
+            try:
+                applied = {} if force else _applied_versions(db)
+                if applied == expected:
+                    return
+
+                if applied.get("schema") != SCHEMA_VERSION:
+                    print("Creating database schema...")
+                    Base.metadata.create_all(bind=engine)
+                    _ensure_indexes()
+                    create_archive_views(db)
+                    rebuild_rollup(db)
+                    _ensure_data_versions(db)
+                    _record_version(db, "schema", SCHEMA_VERSION)
+
+                if applied.get("triggers") != TRIGGER_VERSION:
+                    print("Setting up room triggers...")
+                    create_room_triggers(db)
+
+                    print("Updating all room statuses...")
+                    update_all_room_statuses(db)
+                    _record_version(db, "triggers", TRIGGER_VERSION)
+
+                print("Room management system initialized successfully!")
+            except Exception as e:
+                db.rollback()
+                print(f"Error running bootstrap: {e}")
+            finally:
+                db.close()
+        finally:
+            lock_conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": BOOTSTRAP_LOCK_NAME})
+
+
 if __name__ == "__main__":
-    initialize_triggers()
\ No newline at end of file
+    run_bootstrap(force=True)
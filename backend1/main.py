@@ -1,14 +1,37 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from database import engine, Base
-from routers import room, roomtype, contract, student, invoice, service, serviceusage, auth
-from init_triggers import initialize_triggers
-Base.metadata.create_all(bind=engine)
+from database import engine
+from routers import room, roomtype, contract, student, invoice, service, serviceusage, auth, metrics, internal, dashboard, report
+from init_triggers import run_bootstrap
+from utils.sql_instrumentation import install_sql_instrumentation, SQLInstrumentationMiddleware
+from utils.metrics import install_pool_metrics, MetricsMiddleware
+from utils.security import auth_dependencies
+from utils.admission import AdmissionControlMiddleware, configure_threadpool
+
+# serve.py runs the bootstrap once in its master process before forking workers
+if not os.getenv("SKIP_STARTUP_BOOTSTRAP"):
+    run_bootstrap()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_threadpool()
+    yield
+
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
-initialize_triggers()
+install_sql_instrumentation(engine)
+install_pool_metrics(engine)
+# Added first so it runs innermost: shed requests still get metrics and CORS headers
+app.add_middleware(AdmissionControlMiddleware)
+app.add_middleware(SQLInstrumentationMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 origins = [
     "http://localhost",
@@ -29,12 +52,16 @@ app.add_middleware(
 def read_root():
     return {"message": "Hello World"}
 
-# Include all routers
+# Include all routers; data routers require a token when AUTH_REQUIRED is set
 app.include_router(auth.router)
-app.include_router(room.router)
-app.include_router(roomtype.router)
-app.include_router(contract.router)
-app.include_router(student.router)
-app.include_router(invoice.router)
-app.include_router(service.router)
-app.include_router(serviceusage.router)
+app.include_router(room.router, dependencies=auth_dependencies)
+app.include_router(roomtype.router, dependencies=auth_dependencies)
+app.include_router(contract.router, dependencies=auth_dependencies)
+app.include_router(student.router, dependencies=auth_dependencies)
+app.include_router(invoice.router, dependencies=auth_dependencies)
+app.include_router(service.router, dependencies=auth_dependencies)
+app.include_router(serviceusage.router, dependencies=auth_dependencies)
+app.include_router(metrics.router)
+app.include_router(internal.router, dependencies=auth_dependencies)
+app.include_router(dashboard.router, dependencies=auth_dependencies)
+app.include_router(report.router, dependencies=auth_dependencies)
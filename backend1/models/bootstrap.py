@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, DateTime
+from database import Base
+
+class BootstrapVersion(Base):
+    __tablename__ = 'BootstrapVersion'
+
+    Component = Column(String(50), primary_key=True)
+    Version = Column(String(50), nullable=False)
+    AppliedAt = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -11,6 +11,11 @@ class Contract(Base):
     StartDate = Column(Date, nullable=False)
     EndDate = Column(Date, nullable=False)
 
+    __table_args__ = (
+        Index('ix_contract_start_date', 'StartDate'),
+        Index('ix_contract_end_date', 'EndDate'),
+    )
+
     # Relationships
     students = relationship("Student", back_populates="contracts")
     rooms = relationship("Room", back_populates="contracts")
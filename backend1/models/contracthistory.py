@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Date, DateTime, Index
+from database import Base
+
+class ContractHistory(Base):
+    """Contracts moved out of Contract by utils/archive.py, same columns plus ArchivedAt"""
+    __tablename__ = 'ContractHistory'
+
+    ContractID = Column(Integer, primary_key=True, autoincrement=False)
+    StudentID = Column(Integer, nullable=False)
+    RoomID = Column(Integer, nullable=False)
+    StartDate = Column(Date, nullable=False)
+    EndDate = Column(Date, nullable=False)
+    ArchivedAt = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_contracthistory_student', 'StudentID'),
+        Index('ix_contracthistory_room', 'RoomID'),
+        Index('ix_contracthistory_end_date', 'EndDate'),
+    )
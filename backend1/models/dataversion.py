@@ -0,0 +1,8 @@
+from sqlalchemy import Column, String, BigInteger
+from database import Base
+
+class DataVersion(Base):
+    __tablename__ = 'DataVersion'
+
+    TableName = Column(String(50), primary_key=True)
+    Version = Column(BigInteger, nullable=False, default=0)
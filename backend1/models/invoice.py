@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Numeric, ForeignKey, Date    
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -10,6 +10,11 @@ class Invoice(Base):
     DueDate = Column(Date, nullable=False)
     TotalAmount = Column(Numeric(10, 2), nullable=False)
 
+    __table_args__ = (
+        Index('ix_invoice_due_date', 'DueDate'),
+        Index('ix_invoice_created_date', 'CreatedDate'),
+    )
+
     # Relationships
     service_usages = relationship("ServiceUsage", back_populates="invoice")
 
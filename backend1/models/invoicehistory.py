@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Numeric, Date, DateTime, Index
+from database import Base
+
+class InvoiceHistory(Base):
+    """Invoices moved out of Invoice by utils/archive.py, same columns plus ArchivedAt"""
+    __tablename__ = 'InvoiceHistory'
+
+    InvoiceID = Column(Integer, primary_key=True, autoincrement=False)
+    CreatedDate = Column(Date, nullable=False)
+    DueDate = Column(Date, nullable=False)
+    TotalAmount = Column(Numeric(10, 2), nullable=False)
+    ArchivedAt = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_invoicehistory_created_date', 'CreatedDate'),
+    )
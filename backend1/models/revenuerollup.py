@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, BigInteger, Numeric
+from database import Base
+
+class RevenueRollup(Base):
+    """Service usage totals per month, service and room type, kept by utils/revenue_rollup.py"""
+    __tablename__ = 'RevenueRollup'
+
+    UsageYear = Column(Integer, primary_key=True, autoincrement=False)
+    UsageMonth = Column(Integer, primary_key=True, autoincrement=False)
+    ServiceID = Column(Integer, primary_key=True, autoincrement=False)
+    RoomTypeID = Column(Integer, primary_key=True, autoincrement=False)
+    Quantity = Column(BigInteger, nullable=False, default=0)
+    Amount = Column(Numeric(14, 2), nullable=False, default=0)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, Index
+from database import Base
+
+class RevokedToken(Base):
+    """Access tokens revoked by logout before they expired"""
+    __tablename__ = 'RevokedToken'
+
+    TokenID = Column(String(32), primary_key=True)
+    ExpiresAt = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_revokedtoken_expires_at', 'ExpiresAt'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -11,6 +11,12 @@ class Room(Base):
     MaxOccupancy = Column(Integer, nullable=False)
     Status = Column(Enum('Available', 'Full', name='room_status'), default='Available')
 
+    __table_args__ = (
+        Index('ix_room_type_status', 'RoomTypeID', 'Status'),
+        Index('ix_room_status', 'Status'),
+        Index('ix_room_number', 'RoomNumber'),
+    )
+
     # Relationships
     room_types = relationship("RoomType", back_populates="rooms")
     contracts = relationship("Contract", back_populates="rooms") 
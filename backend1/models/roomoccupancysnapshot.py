@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Date, Index
+from database import Base
+
+class RoomOccupancySnapshot(Base):
+    """Active contracts per room at the end of a day, written by utils/occupancy_snapshot.py"""
+    __tablename__ = 'RoomOccupancySnapshot'
+
+    SnapshotDate = Column(Date, primary_key=True)
+    RoomID = Column(Integer, primary_key=True, autoincrement=False)
+    RoomTypeID = Column(Integer, nullable=False)
+    Occupants = Column(Integer, nullable=False)
+    MaxOccupancy = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_roomoccupancysnapshot_room', 'RoomID', 'SnapshotDate'),
+    )
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, Date
+from database import Base
+
+class RoomTypeOccupancySnapshot(Base):
+    """Per room type totals of RoomOccupancySnapshot for one day"""
+    __tablename__ = 'RoomTypeOccupancySnapshot'
+
+    SnapshotDate = Column(Date, primary_key=True)
+    RoomTypeID = Column(Integer, primary_key=True, autoincrement=False)
+    Rooms = Column(Integer, nullable=False)
+    Beds = Column(Integer, nullable=False)
+    Occupants = Column(Integer, nullable=False)
+    FreeBeds = Column(Integer, nullable=False)
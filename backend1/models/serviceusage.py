@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -13,6 +13,10 @@ class ServiceUsage(Base):
     UsageMonth = Column(Integer, nullable=False)
     UsageYear = Column(Integer, nullable=False)
 
+    __table_args__ = (
+        Index('ix_serviceusage_period', 'UsageYear', 'UsageMonth'),
+    )
+
     # Relationships
     services = relationship("Service", back_populates="service_usages") 
     invoice = relationship("Invoice", back_populates="service_usages") 
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime, Index
+from database import Base
+
+class ServiceUsageHistory(Base):
+    """Service usages moved out of ServiceUsage by utils/archive.py, same columns plus ArchivedAt"""
+    __tablename__ = 'ServiceUsageHistory'
+
+    ServiceUsageID = Column(Integer, primary_key=True, autoincrement=False)
+    ContractID = Column(Integer, nullable=False)
+    InvoiceID = Column(Integer, nullable=False)
+    ServiceID = Column(Integer, nullable=False)
+    Quantity = Column(Integer, nullable=False)
+    UsageMonth = Column(Integer, nullable=False)
+    UsageYear = Column(Integer, nullable=False)
+    ArchivedAt = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_serviceusagehistory_period', 'UsageYear', 'UsageMonth'),
+        Index('ix_serviceusagehistory_contract', 'ContractID'),
+    )
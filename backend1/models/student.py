@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum
+from sqlalchemy import Column, Integer, String, Enum, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -9,6 +9,11 @@ class Student(Base):
     FullName = Column(String(100), nullable=False)
     Gender = Column(Enum('Male', 'Female', name='gender'), nullable=False)
     PhoneNumber = Column(String(10), nullable=False)
+
+    __table_args__ = (
+        Index('ix_student_full_name', 'FullName'),
+        Index('ix_student_gender', 'Gender'),
+    )
     
     # Relationships
     contracts = relationship("Contract", back_populates="students") 
@@ -1,8 +1,15 @@
+import time
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from crud import user as crud_user
-from schemas.user import UserLogin, UserResponse
+from schemas.user import UserLogin, UserResponse, TokenResponse
+from utils.security import (
+    bearer_scheme, create_access_token, decode_access_token, get_current_user, hash_password, is_password_hash,
+    revoke_token, run_hashing, verify_password
+)
 
 router = APIRouter(
     prefix="/auth",
@@ -16,34 +23,63 @@ def get_db():
     finally:
         db.close()
 
-@router.post("/login", response_model=UserResponse)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = crud_user.authenticate_user(db, user_credentials.username, user_credentials.password)
-    if not user:
+# login and register are async so that bcrypt runs on its own bounded pool
+# instead of holding a request thread for the whole hash. Their database
+# calls go to the request threadpool, so a queue of hashes never holds a
+# database connection.
+
+@router.post("/login", response_model=TokenResponse)
+async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(crud_user.get_user_by_username, db, user_credentials.username)
+    valid = await run_hashing(verify_password, user_credentials.password, user.Password if user else None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
-    
-    return UserResponse(
+    if not is_password_hash(user.Password):
+        # Passwords stored before hashing was added are upgraded on first login
+        password_hash = await run_hashing(hash_password, user_credentials.password)
+        user = await run_in_threadpool(crud_user.set_password_hash, db, user, password_hash)
+
+    access_token, expires_in = create_access_token(user.UserID, user.Username)
+    return TokenResponse(
         UserID=user.UserID,
         Username=user.Username,
-        message="Login successful"
+        message="Login successful",
+        access_token=access_token,
+        expires_in=expires_in
     )
 
 @router.post("/register", response_model=UserResponse)
-def register(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def register(user_credentials: UserLogin, db: Session = Depends(get_db)):
     # Check if username already exists
-    existing_user = crud_user.get_user_by_username(db, user_credentials.username)
+    existing_user = await run_in_threadpool(crud_user.get_user_by_username, db, user_credentials.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already exists"
         )
     
-    user = crud_user.create_user(db, user_credentials.username, user_credentials.password)
+    password_hash = await run_hashing(hash_password, user_credentials.password)
+    user = await run_in_threadpool(crud_user.add_user, db, user_credentials.username, password_hash)
     return UserResponse(
         UserID=user.UserID,
         Username=user.Username,
         message="User registered successfully"
-    ) 
\ No newline at end of file
+    )
+
+@router.get("/me")
+def read_current_user(claims: dict = Depends(get_current_user)):
+    """The identity carried by the bearer token"""
+    return {"UserID": int(claims["sub"]), "Username": claims.get("username"), "expires_at": claims["exp"]}
+
+@router.post("/logout")
+def logout(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db)):
+    # Clients that never got a token (or lost it) can still log out, and
+    # an expired token is already as good as logged out
+    if credentials is not None:
+        claims = decode_access_token(credentials.credentials, allow_expired=True)
+        if claims["exp"] > time.time():
+            revoke_token(db, claims)
+    return {"message": "Logout successful"}
@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List
+from typing import List, Optional
 from database import SessionLocal
 from datetime import date
 from crud import contract as crud_contract
-from schemas.contract import ContractCreate, ContractOut, ContractDetail, PaginatedContractResponse
-from models.student import Student
-from models.room import Room
-import math
+from schemas.contract import ContractCreate, ContractOut, ContractDetail, PaginatedContractResponse, ContractStatusRequest, ContractRenewal, ContractTransfer
+from schemas.helper import page_payload, json_response
+from utils.data_version import conditional_get, etag_headers
 from utils.export_file import export_contracts_to_excel
 
 router = APIRouter(
@@ -16,6 +16,9 @@ router = APIRouter(
     tags=["contracts"]
 )
 
+contract_page_adapter = TypeAdapter(PaginatedContractResponse)
+contract_details_adapter = TypeAdapter(ContractDetail)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -27,13 +30,29 @@ def get_db():
 def create_contract(contract: ContractCreate, db: Session = Depends(get_db)):
     return crud_contract.create_contract(db, contract)
 
+@router.post("/renew")
+def renew_contracts(renewal: ContractRenewal, db: Session = Depends(get_db)):
+    """Extend every contract matching the selection to new_end_date in one transaction"""
+    return crud_contract.renew_contracts(db, renewal)
+
+@router.post("/transfer")
+def transfer_contracts(transfer: ContractTransfer, db: Session = Depends(get_db)):
+    """Apply a batch of room moves atomically, checking net capacity per room"""
+    return crud_contract.transfer_contracts(db, transfer)
+
 @router.get("/{contract_id}", response_model=ContractOut)
 def get_contract_by_id(contract_id: int, db: Session = Depends(get_db)):
     return crud_contract.get_contract_by_id(db, contract_id)
 
-@router.get("/{contract_id}/details")
+@router.get("/{contract_id}/details", response_model=ContractDetail)
 def get_contract_details(contract_id: int, db: Session = Depends(get_db)):
-    return crud_contract.get_contract_by_id_with_details(db, contract_id)
+    details = crud_contract.get_contract_by_id_with_details(db, contract_id)
+    if not details:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Contract not found"
+        )
+    return json_response(contract_details_adapter, details)
 
 @router.put("/{contract_id}", response_model=ContractOut)
 def update_contract(contract_id: int, contract: ContractCreate, db: Session = Depends(get_db)):
@@ -47,18 +66,21 @@ def delete_contract(contract_id: int, db: Session = Depends(get_db)):
 def read_contracts(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
+    student_id: Optional[int] = Query(None),
+    room_id: Optional[int] = Query(None),
+    active_from: Optional[date] = Query(None, description="Only contracts still running on or after this date"),
+    active_to: Optional[date] = Query(None, description="Only contracts started on or before this date"),
+    sort: str = Query("ContractID", description="ContractID, StartDate or EndDate, prefix with - for descending"),
+    etag: str = Depends(conditional_get("Contract", "Room")),
     db: Session = Depends(get_db)
 ):
     skip = (page - 1) * size
-    contracts, total = crud_contract.get_contracts_with_count(db, skip=skip, limit=size)
+    contracts, total = crud_contract.get_contracts_with_count(
+        db, skip=skip, limit=size, student_id=student_id, room_id=room_id,
+        active_from=active_from, active_to=active_to, sort=sort
+    )
     
-    return {
-        "items": contracts,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": math.ceil(total / size) if total > 0 else 0
-    }
+    return json_response(contract_page_adapter, page_payload(contracts, total, page, size), headers=etag_headers(etag))
 
 @router.get("/export/excel")
 def export_contracts_excel(db: Session = Depends(get_db)):
@@ -67,48 +89,16 @@ def export_contracts_excel(db: Session = Depends(get_db)):
 @router.get("/student/{student_id}/status")
 def get_student_contract_status(student_id: int, db: Session = Depends(get_db)):
     """Get the contract status for a specific student"""
-    # Check if student exists
-    student = db.query(Student).filter(Student.StudentID == student_id).first()
-    if not student:
+    student_status = crud_contract.get_student_contract_statuses(db, [student_id]).get(student_id)
+    if not student_status:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found"
         )
-    
-    # Get active contract
-    active_contract = crud_contract.get_student_active_contract(db, student_id)
-    
-    # Get all contracts
-    all_contracts = crud_contract.get_student_all_contracts(db, student_id)
-    
-    response = {
-        "student_id": student_id,
-        "student_name": student.FullName,
-        "has_active_contract": active_contract is not None,
-        "active_contract": None,
-        "all_contracts": []
-    }
-    
-    if active_contract:
-        room = db.query(Room).filter(Room.RoomID == active_contract.RoomID).first()
-        response["active_contract"] = {
-            "contract_id": active_contract.ContractID,
-            "room_id": active_contract.RoomID,
-            "room_number": room.RoomNumber if room else "Unknown",
-            "start_date": active_contract.StartDate,
-            "end_date": active_contract.EndDate
-        }
-    
-    for contract in all_contracts:
-        room = db.query(Room).filter(Room.RoomID == contract.RoomID).first()
-        response["all_contracts"].append({
-            "contract_id": contract.ContractID,
-            "room_id": contract.RoomID,
-            "room_number": room.RoomNumber if room else "Unknown",
-            "start_date": contract.StartDate,
-            "end_date": contract.EndDate,
-            "is_active": contract.StartDate <= date.today() <= contract.EndDate
-        })
-    
-    return response
+    return student_status
 
+@router.post("/status")
+def get_student_contract_statuses(request: ContractStatusRequest, db: Session = Depends(get_db)):
+    """Contract status for many students at once, in the order requested; unknown IDs are skipped"""
+    statuses = crud_contract.get_student_contract_statuses(db, request.student_ids)
+    return [statuses[student_id] for student_id in dict.fromkeys(request.student_ids) if student_id in statuses]
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from schemas.dashboard import DashboardSummary
+from schemas.helper import json_response
+from utils.dashboard import get_summary
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["dashboard"]
+)
+
+summary_adapter = TypeAdapter(DashboardSummary)
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/summary", response_model=DashboardSummary)
+def read_summary(db: Session = Depends(get_db)):
+    """Occupancy, free beds per room type and invoice totals, from this worker's snapshot"""
+    return json_response(summary_adapter, get_summary(db))
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from utils.slow_query import get_slow_queries
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"]
+)
+
+@router.get("/slow-queries")
+def read_slow_queries():
+    """Slow statements recorded by this worker, with one EXPLAIN plan per fingerprint"""
+    return get_slow_queries()
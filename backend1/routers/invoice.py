@@ -1,10 +1,13 @@
-import math
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 from database import SessionLocal
 from crud import invoice as crud_invoice
 from schemas.invoice import InvoiceCreate, InvoiceOut, PaginatedInvoiceResponse, InvoiceDetail
+from schemas.helper import page_payload, json_response
+from utils.data_version import bump_version, conditional_get, etag_headers
 from utils.invoice_triggers import recalculate_invoice_amount, recalculate_all_invoice_amounts
 from utils.export_file import export_invoices_to_excel
 
@@ -13,6 +16,9 @@ router = APIRouter(
     tags=["invoices"]
 )
 
+invoice_page_adapter = TypeAdapter(PaginatedInvoiceResponse)
+invoice_details_adapter = TypeAdapter(InvoiceDetail)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -28,25 +34,35 @@ def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db)):
 def read_invoices_paginated(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
+    overdue: Optional[bool] = Query(None, description="true for invoices past their due date, false for the others"),
+    due_from: Optional[date] = Query(None, description="Due on or after this date"),
+    due_to: Optional[date] = Query(None, description="Due on or before this date"),
+    created_from: Optional[date] = Query(None, description="Created on or after this date"),
+    created_to: Optional[date] = Query(None, description="Created on or before this date"),
+    sort: str = Query("InvoiceID", description="InvoiceID, CreatedDate or DueDate, prefix with - for descending"),
+    etag: str = Depends(conditional_get("Invoice")),
     db: Session = Depends(get_db)
 ):
     skip = (page - 1) * size
-    invoices, total = crud_invoice.get_invoices_with_count(db, skip, size)
-    return {
-        "items": invoices,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": math.ceil(total / size) if total > 0 else 0
-    }
+    invoices, total = crud_invoice.get_invoices_with_count(
+        db, skip, size, overdue=overdue, due_from=due_from, due_to=due_to,
+        created_from=created_from, created_to=created_to, sort=sort
+    )
+    return json_response(invoice_page_adapter, page_payload(invoices, total, page, size), headers=etag_headers(etag))
 
 @router.get("/{invoice_id}", response_model=InvoiceOut)
 def get_invoice_by_id(invoice_id: int, db: Session = Depends(get_db)):
     return crud_invoice.get_invoice_by_id(db, invoice_id)
 
-@router.get("/{invoice_id}/details")
+@router.get("/{invoice_id}/details", response_model=InvoiceDetail)
 def get_invoice_details(invoice_id: int, db: Session = Depends(get_db)):
-    return crud_invoice.get_invoice_by_id_with_details(db, invoice_id)
+    details = crud_invoice.get_invoice_by_id_with_details(db, invoice_id)
+    if not details:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invoice not found"
+        )
+    return json_response(invoice_details_adapter, details)
 
 @router.put("/{invoice_id}", response_model=InvoiceOut)
 def update_invoice(invoice_id: int, invoice: InvoiceCreate, db: Session = Depends(get_db)):
@@ -60,6 +76,7 @@ def delete_invoice(invoice_id: int, db: Session = Depends(get_db)):
 def recalculate_invoice(invoice_id: int, db: Session = Depends(get_db)):
     invoice = crud_invoice.get_invoice_by_id(db, invoice_id)
     recalculate_invoice_amount(db, invoice_id)
+    bump_version(db, "Invoice")
     db.commit()
     db.refresh(invoice)
     return invoice
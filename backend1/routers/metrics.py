@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+from utils.metrics import render_metrics
+
+router = APIRouter(
+    tags=["metrics"]
+)
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
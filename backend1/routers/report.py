@@ -0,0 +1,52 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from crud import report as crud_report
+from schemas.helper import json_response
+from schemas.report import OccupancyReport, RevenueReport
+
+router = APIRouter(
+    prefix="/reports",
+    tags=["reports"]
+)
+
+revenue_adapter = TypeAdapter(RevenueReport)
+occupancy_adapter = TypeAdapter(OccupancyReport)
+
+PERIOD_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/revenue", response_model=RevenueReport)
+def read_revenue(
+    group_by: str = Query("month", description="Comma separated: year, month, service, room_type"),
+    period_from: str = Query(None, pattern=PERIOD_PATTERN, description="First month, YYYY-MM"),
+    period_to: str = Query(None, pattern=PERIOD_PATTERN, description="Last month, YYYY-MM"),
+    service_id: int = None,
+    room_type_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """Service usage quantity and revenue from the pre-aggregated rollup"""
+    report = crud_report.get_revenue(db, group_by, period_from, period_to, service_id, room_type_id)
+    return json_response(revenue_adapter, report)
+
+@router.get("/occupancy", response_model=OccupancyReport)
+def read_occupancy(
+    date_from: date,
+    date_to: date,
+    group_by: str = Query("total", description="total, room_type or room"),
+    room_type_id: int = None,
+    room_id: int = None,
+    db: Session = Depends(get_db)
+):
+    """Daily occupancy series read from the snapshot tables"""
+    report = crud_report.get_occupancy(db, date_from, date_to, group_by, room_type_id, room_id)
+    return json_response(occupancy_adapter, report)
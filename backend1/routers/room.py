@@ -1,11 +1,12 @@
-import math
-
 from fastapi import APIRouter, Depends, Query
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 from database import SessionLocal
 from crud import room as crud_room
-from schemas.room import RoomCreate, RoomOut, RoomDetailsOut, PaginatedRoomResponse, RoomSearchResult
+from schemas.room import RoomCreate, RoomOut, RoomDetailsOut, PaginatedRoomResponse, RoomSearchResult, RoomSuggestion
+from schemas.helper import page_payload, json_response
+from utils.data_version import conditional_get, etag_headers
 from utils.room_triggers import get_room_occupancy_info, update_all_room_statuses, create_room_triggers
 from utils.export_file import export_rooms_to_excel
 
@@ -14,6 +15,11 @@ router = APIRouter(
     tags=["rooms"]
 )
 
+room_page_adapter = TypeAdapter(PaginatedRoomResponse)
+room_details_adapter = TypeAdapter(RoomDetailsOut)
+room_search_adapter = TypeAdapter(List[RoomSearchResult])
+room_suggestion_adapter = TypeAdapter(List[RoomSuggestion])
+
 def get_db():
     db = SessionLocal()
     try:
@@ -29,17 +35,16 @@ def create_room(room: RoomCreate, db: Session = Depends(get_db)):
 def read_rooms_paginated(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
+    room_type_id: Optional[int] = Query(None, description="Only rooms of this room type"),
+    room_status: Optional[Literal["Available", "Full"]] = Query(None, alias="status", description="Only rooms with this status"),
+    floor: Optional[int] = Query(None, ge=0, description="Only rooms on this floor"),
+    sort: str = Query("RoomID", description="RoomID or RoomNumber, prefix with - for descending"),
+    etag: str = Depends(conditional_get("Room")),
     db: Session = Depends(get_db)
 ):
     skip = (page - 1) * size
-    rooms, total = crud_room.get_rooms_with_count(db, skip, size)
-    return {
-        "items": rooms,
-        "total": total,
-        "page": skip // size + 1,
-        "size": size,
-        "pages": math.ceil(total / size) if total > 0 else 0
-    }
+    rooms, total = crud_room.get_rooms_with_count(db, skip, size, room_type_id, room_status, floor, sort)
+    return json_response(room_page_adapter, page_payload(rooms, total, page, size), headers=etag_headers(etag))
 
 @router.put("/{room_id}", response_model=RoomOut)
 def update_room(room_id: int, room: RoomCreate, db: Session = Depends(get_db)):
@@ -57,7 +62,7 @@ def get_room_by_id(room_id: int, db: Session = Depends(get_db)):
 @router.get("/{room_id}/details", response_model=RoomDetailsOut)
 def get_room_details(room_id: int, db: Session = Depends(get_db)):
     try:
-        return crud_room.get_room_details_by_id(db, room_id)
+        return json_response(room_details_adapter, crud_room.get_room_details_by_id(db, room_id))
     except Exception as e:
         print(f"Error getting room details for ID {room_id}: {e}")
         raise
@@ -73,7 +78,18 @@ def search_rooms_by_number(
     db: Session = Depends(get_db)
 ):
     """Search for rooms by room number and return just ID and room number"""
-    return crud_room.search_rooms_by_number(db, room_number)
+    return json_response(room_search_adapter, crud_room.search_rooms_by_number(db, room_number))
+
+@router.get("/search/suggest", response_model=List[RoomSuggestion])
+def suggest_rooms(
+    q: str = Query("", description="Beginning or part of a room number"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    room_type_id: Optional[int] = Query(None, description="Only rooms of this room type"),
+    room_status: Optional[Literal["Available", "Full"]] = Query(None, alias="status", description="Only rooms with this status"),
+    db: Session = Depends(get_db)
+):
+    """Autocomplete room numbers, exact and prefix matches first"""
+    return json_response(room_suggestion_adapter, crud_room.suggest_rooms(db, q, limit, room_type_id, room_status))
 
 @router.get("/{room_id}/occupancy")
 def get_room_occupancy(room_id: int, db: Session = Depends(get_db)):
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List
 from database import SessionLocal
 from crud import roomtype as crud_roomtype
 from schemas.roomtype import RoomTypeCreate, RoomTypeOut
+from schemas.helper import json_response
+from utils.data_version import conditional_get, etag_headers
 
 router = APIRouter(
     prefix="/roomtypes",
     tags=["roomtypes"]
 )
 
+roomtype_list_adapter = TypeAdapter(List[RoomTypeOut])
+
 def get_db():
     db = SessionLocal()
     try:
@@ -22,8 +27,8 @@ def create_roomtype(roomtype: RoomTypeCreate, db: Session = Depends(get_db)):
     return crud_roomtype.create_roomtype(db, roomtype)
 
 @router.get("/", response_model=List[RoomTypeOut])
-def read_roomtypes(db: Session = Depends(get_db)):
-    return crud_roomtype.get_roomtypes(db) 
+def read_roomtypes(etag: str = Depends(conditional_get("RoomType")), db: Session = Depends(get_db)):
+    return json_response(roomtype_list_adapter, crud_roomtype.get_roomtypes(db), headers=etag_headers(etag))
 
 @router.get("/{roomtype_id}", response_model=RoomTypeOut)
 def get_roomtype_by_id(roomtype_id: int, db: Session = Depends(get_db)):
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List
 from database import SessionLocal
 from crud import service as crud_service
 from schemas.service import ServiceCreate, ServiceOut
+from schemas.helper import json_response
+from utils.data_version import conditional_get, etag_headers
 from utils.export_file import export_services_to_excel
 
 router = APIRouter(
@@ -11,6 +14,8 @@ router = APIRouter(
     tags=["services"]
 )
 
+service_list_adapter = TypeAdapter(List[ServiceOut])
+
 def get_db():
     db = SessionLocal()
     try:
@@ -23,8 +28,8 @@ def create_service(service: ServiceCreate, db: Session = Depends(get_db)):
     return crud_service.create_service(db, service)
 
 @router.get("/", response_model=List[ServiceOut])
-def read_services(db: Session = Depends(get_db)):
-    return crud_service.get_services(db)
+def read_services(etag: str = Depends(conditional_get("Service")), db: Session = Depends(get_db)):
+    return json_response(service_list_adapter, crud_service.get_services(db), headers=etag_headers(etag))
 
 @router.get("/export/excel")
 def export_services_excel(db: Session = Depends(get_db)):
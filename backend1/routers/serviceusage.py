@@ -1,16 +1,21 @@
-import math
 from fastapi import APIRouter, Depends, Query
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import SessionLocal
 from crud import serviceusage as crud_serviceusage
 from schemas.serviceusage import ServiceUsageCreate, ServiceUsageOut, PaginatedServiceUsageResponse
+from schemas.helper import page_payload, json_response
+from utils.data_version import conditional_get, etag_headers
 
 router = APIRouter(
     prefix="/serviceusages",
     tags=["serviceusages"]
 )
 
+serviceusage_page_adapter = TypeAdapter(PaginatedServiceUsageResponse)
+serviceusage_list_adapter = TypeAdapter(List[ServiceUsageOut])
+
 def get_db():
     db = SessionLocal()
     try:
@@ -26,21 +31,25 @@ def create_serviceusage(serviceusage: ServiceUsageCreate, db: Session = Depends(
 def read_serviceusages_paginated(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
+    contract_id: Optional[int] = Query(None),
+    invoice_id: Optional[int] = Query(None),
+    service_id: Optional[int] = Query(None),
+    usage_year: Optional[int] = Query(None),
+    usage_month: Optional[int] = Query(None, ge=1, le=12),
+    sort: str = Query("ServiceUsageID", description="ServiceUsageID or UsagePeriod, prefix with - for descending"),
+    etag: str = Depends(conditional_get("ServiceUsage")),
     db: Session = Depends(get_db)
 ):
     skip = (page - 1) * size
-    serviceusages, total = crud_serviceusage.get_serviceusages_with_count(db, skip, size)
-    return {
-        "items": serviceusages,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": math.ceil(total / size) if total > 0 else 0
-    }
+    serviceusages, total = crud_serviceusage.get_serviceusages_with_count(
+        db, skip, size, contract_id=contract_id, invoice_id=invoice_id, service_id=service_id,
+        usage_year=usage_year, usage_month=usage_month, sort=sort
+    )
+    return json_response(serviceusage_page_adapter, page_payload(serviceusages, total, page, size), headers=etag_headers(etag))
 
 @router.get("/all", response_model=List[ServiceUsageOut])
 def read_all_serviceusages(db: Session = Depends(get_db)):
-    return crud_serviceusage.get_serviceusages(db)
+    return json_response(serviceusage_list_adapter, crud_serviceusage.get_serviceusages(db))
 
 
 @router.get("/{serviceusage_id}", response_model=ServiceUsageOut)
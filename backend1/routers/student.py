@@ -1,11 +1,12 @@
-import math
-
 from fastapi import APIRouter, Depends, Query
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 from database import SessionLocal
 from crud import student as crud_student
 from schemas.student import StudentCreate, StudentOut, PaginatedStudentResponse
+from schemas.helper import page_payload, json_response
+from utils.data_version import conditional_get, etag_headers
 from utils.export_file import export_students_to_excel
 
 router = APIRouter(
@@ -13,6 +14,9 @@ router = APIRouter(
     tags=["students"]
 )
 
+student_page_adapter = TypeAdapter(PaginatedStudentResponse)
+student_list_adapter = TypeAdapter(List[StudentOut])
+
 def get_db():
     db = SessionLocal()
     try:
@@ -28,18 +32,23 @@ def create_student(student: StudentCreate, db: Session = Depends(get_db)):
 def read_students(
         page: int = Query(1, ge=1, description="Page number"),
         size: int = Query(10, ge=1, le=100, description="Items per page"),
+        gender: Optional[Literal["Male", "Female"]] = Query(None, description="Only students of this gender"),
+        sort: str = Query("StudentID", description="StudentID or FullName, prefix with - for descending"),
+        etag: str = Depends(conditional_get("Student")),
         db: Session = Depends(get_db)
 ):
     skip = (page - 1) * size
-    students, total = crud_student.get_students_with_count(db, skip=skip, limit=size)
-
-    return {
-        "items": students,
-        "total": total,
-        "page": page,
-        "size": size,
-        "pages": math.ceil(total / size) if total > 0 else 0
-    }
+    students, total = crud_student.get_students_with_count(db, skip=skip, limit=size, gender=gender, sort=sort)
+
+    return json_response(student_page_adapter, page_payload(students, total, page, size), headers=etag_headers(etag))
+
+@router.get("/search", response_model=List[StudentOut])
+def search_students(
+        q: str = Query(..., min_length=1, description="Name (accents optional) or beginning of a phone number"),
+        limit: int = Query(20, ge=1, le=100, description="Maximum number of results")
+):
+    """Search students by name or phone number, best matches first"""
+    return json_response(student_list_adapter, crud_student.search_students(q, limit))
 
 
 @router.get("/{student_id}", response_model=StudentOut)
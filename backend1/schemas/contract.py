@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import date
-from typing import List, Generic, TypeVar
+from typing import List, Generic, Optional, TypeVar
 
 from schemas.helper import PaginatedResponse
 
@@ -16,8 +16,7 @@ class ServiceUsageBase(BaseModel):
     UsageMonth: int
     UsageYear: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ContractDetail(BaseModel):
@@ -31,8 +30,7 @@ class ContractDetail(BaseModel):
     EndDate: date
     ServiceUsages: List[ServiceUsageBase] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ContractCreate(BaseModel):
@@ -45,8 +43,7 @@ class ContractCreate(BaseModel):
 class ContractOut(ContractCreate):
     ContractID: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ContractPaginatedOut(BaseModel):
     ContractID: int
@@ -62,3 +59,26 @@ class PaginatedContractResponse(PaginatedResponse[ContractPaginatedOut]):
     pass
 
 
+class ContractStatusRequest(BaseModel):
+    student_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class ContractRenewal(BaseModel):
+    """Select contracts by end-date window, optionally narrowed by room or room type, and extend them"""
+    new_end_date: date
+    # Required, so a room selection cannot revive contracts of students long gone
+    end_from: date
+    end_to: Optional[date] = None
+    room_id: Optional[int] = None
+    room_type_id: Optional[int] = None
+    skip_conflicts: bool = False
+
+
+class ContractMove(BaseModel):
+    contract_id: int
+    room_id: int
+
+
+class ContractTransfer(BaseModel):
+    """Room moves applied together, so students can swap between full rooms"""
+    moves: List[ContractMove] = Field(..., min_length=1, max_length=1000)
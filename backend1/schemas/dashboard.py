@@ -0,0 +1,27 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class RoomTypeBeds(BaseModel):
+    room_type_id: int
+    room_type_name: Optional[str] = None
+    rooms: int
+    beds: int
+    occupants: int
+    free_beds: int
+
+
+class DashboardSummary(BaseModel):
+    as_of: date
+    total_beds: int
+    active_contracts: int
+    free_beds: int
+    occupancy_rate: float
+    room_types: List[RoomTypeBeds]
+    revenue_this_month: float
+    invoices_this_month: int
+    overdue_total: float
+    overdue_invoices: int
+    outstanding_total: float
@@ -1,6 +1,8 @@
+import math
 from typing import TypeVar, Generic, List
 
-from pydantic import BaseModel
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 T = TypeVar('T')
 
@@ -11,5 +13,23 @@ class PaginatedResponse(BaseModel, Generic[T]):
     size: int
     pages: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+def page_payload(items, total: int, page: int, size: int) -> dict:
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": math.ceil(total / size) if total > 0 else 0
+    }
+
+
+def json_response(adapter: TypeAdapter, data, headers: dict = None) -> Response:
+    """
+    Validate trusted DB rows with a precompiled adapter and serialize them
+    straight to JSON bytes, skipping FastAPI's response_model round trip.
+    """
+    content = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import date
 from schemas.helper import PaginatedResponse
 from typing import List, Generic, TypeVar
@@ -15,8 +15,7 @@ class ServiceUsageBase(BaseModel):
     UsageMonth: int
     UsageYear: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class InvoiceCreate(BaseModel):
@@ -29,8 +28,7 @@ class InvoiceOut(InvoiceCreate):
     InvoiceID: int
     TotalAmount: float
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
         
 class InvoiceDetail(BaseModel):
     InvoiceID: int
@@ -39,8 +37,7 @@ class InvoiceDetail(BaseModel):
     TotalAmount: float
     ServiceUsages: List[ServiceUsageBase] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PaginatedInvoiceResponse(PaginatedResponse[InvoiceOut]):
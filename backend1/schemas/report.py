@@ -0,0 +1,34 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class RevenueRow(BaseModel):
+    UsageYear: Optional[int] = None
+    UsageMonth: Optional[int] = None
+    ServiceID: Optional[int] = None
+    ServiceName: Optional[str] = None
+    RoomTypeID: Optional[int] = None
+    RoomTypeName: Optional[str] = None
+    Quantity: int
+    Amount: float
+
+
+class RevenueReport(BaseModel):
+    group_by: List[str]
+    rows: List[RevenueRow]
+
+
+class OccupancyRow(BaseModel):
+    SnapshotDate: date
+    RoomID: Optional[int] = None
+    RoomTypeID: Optional[int] = None
+    Beds: int
+    Occupants: int
+    OccupancyRate: float
+
+
+class OccupancyReport(BaseModel):
+    group_by: str
+    rows: List[OccupancyRow]
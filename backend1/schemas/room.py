@@ -1,5 +1,5 @@
 from datetime import date
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from schemas.helper import PaginatedResponse
 
 class RoomCreate(BaseModel):
@@ -12,8 +12,7 @@ class RoomOut(RoomCreate):
     RoomID: int
     Status: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentsInRoom(BaseModel):
     StudentID: int
@@ -33,5 +32,8 @@ class RoomSearchResult(BaseModel):
     RoomID: int
     RoomNumber: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class RoomSuggestion(RoomSearchResult):
+    RoomTypeID: int
+    Status: str
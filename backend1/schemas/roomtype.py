@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class RoomTypeCreate(BaseModel):
     RoomTypeName: str
@@ -7,5 +7,4 @@ class RoomTypeCreate(BaseModel):
 class RoomTypeOut(RoomTypeCreate):
     RoomTypeID: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
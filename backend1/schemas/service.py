@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class ServiceCreate(BaseModel):
     ServiceName: str
@@ -7,5 +7,4 @@ class ServiceCreate(BaseModel):
 class ServiceOut(ServiceCreate):
     ServiceID: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
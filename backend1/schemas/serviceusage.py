@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import date
 from schemas.helper import PaginatedResponse
 
@@ -13,8 +13,7 @@ class ServiceUsageCreate(BaseModel):
 class ServiceUsageOut(ServiceUsageCreate):
     ServiceUsageID: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PaginatedServiceUsageResponse(PaginatedResponse[ServiceUsageOut]):
     pass
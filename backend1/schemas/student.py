@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from schemas.helper import PaginatedResponse
 
@@ -11,8 +11,7 @@ class StudentCreate(BaseModel):
 class StudentOut(StudentCreate):
     StudentID: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PaginatedStudentResponse(PaginatedResponse[StudentOut]):
     pass
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class UserLogin(BaseModel):
     username: str
@@ -9,5 +9,8 @@ class UserResponse(BaseModel):
     Username: str
     message: str
 
-    class Config:
-        orm_mode = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+class TokenResponse(UserResponse):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
@@ -1,183 +1,272 @@
+import argparse
 import datetime
 import random
-from sqlalchemy.orm import Session
-from sqlalchemy import delete
+from multiprocessing import Pool
+from sqlalchemy import insert
 from models.contract import Contract
+from models.contracthistory import ContractHistory
 from models.invoice import Invoice
+from models.invoicehistory import InvoiceHistory
 from models.student import Student
 from models.room import Room
 from models.roomtype import RoomType
+from models.roomoccupancysnapshot import RoomOccupancySnapshot
+from models.roomtypeoccupancysnapshot import RoomTypeOccupancySnapshot
 from models.service import Service
 from models.serviceusage import ServiceUsage
-from database import SessionLocal, Base, engine
+from models.serviceusagehistory import ServiceUsageHistory
+from database import Base, SessionLocal, engine
+from init_triggers import run_bootstrap
+from utils.data_version import bump_version
 
+ROOM_TYPES = [
+    ("Phòng đơn", 850.00, 1),
+    ("Phòng đôi", 850.00, 2),
+    ("Phòng 4 người", 650.00, 4),
+    ("Phòng 8 người (không được nấu ăn)", 400.00, 8),
+    ("Phòng 8 người (được nấu ăn)", 450.00, 8),
+]
 
-def seed_database():
-    # Wipe database first by dropping and recreating all tables
+SERVICES = [
+    ("Internet", 30.00),
+    ("Laundry", 15.00),
+    ("Cleaning", 50.00),
+    ("Parking", 75.00),
+    ("Utilities", 100.00),
+]
+
+FIRST_MALE_NAMES = ["Anh", "Huy", "Tuấn", "Minh", "Long", "Sơn", "Bảo", "Khoa", "Khánh"]
+FIRST_FEMALE_NAMES = ["Linh", "Phương", "Thảo", "Mai", "Hằng", "Trang", "Lan", "Ngọc"]
+LAST_NAMES = ["Nguyễn", "Lê", "Trần", "Hà", "Phạm", "Võ", "Vũ", "Phan", "Trương",
+              "Bùi", "Đặng", "Châu", "Đỗ", "Ngô", "Dương", "Đinh", "Huỳnh"]
+
+# Rooms generated and inserted by one task, and so by one worker process
+ROOMS_PER_TASK = 500
+TERM_MONTHS = 6
+
+
+def _rng(seed: int, *parts) -> random.Random:
+    """A generator that only depends on the seed and the slice being built"""
+    return random.Random(f"{seed}:" + ":".join(str(part) for part in parts))
+
+
+def _add_months(day: datetime.date, months: int) -> datetime.date:
+    month_index = day.year * 12 + day.month - 1 + months
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _terms(count: int):
+    """Consecutive six-month terms, the last one containing today"""
+    today = datetime.date.today()
+    current_start = datetime.date(today.year, 1 if today.month <= TERM_MONTHS else TERM_MONTHS + 1, 1)
+    terms = []
+    for offset in range(count - 1, -1, -1):
+        start = _add_months(current_start, -TERM_MONTHS * offset)
+        end = _add_months(start, TERM_MONTHS) - datetime.timedelta(days=1)
+        terms.append((start, end))
+    return terms
+
+
+def _room_layout(rooms: int, seed: int):
+    """Room type per room and the global index of each room's first bed"""
+    rng = _rng(seed, "rooms")
+    room_types = [rng.randint(1, len(ROOM_TYPES)) for _ in range(rooms)]
+    first_bed = []
+    beds = 0
+    for room_type_id in room_types:
+        first_bed.append(beds)
+        beds += ROOM_TYPES[room_type_id - 1][2]
+    return room_types, first_bed, beds
+
+
+def _insert_chunked(conn, model, rows, chunk_size: int):
+    for start in range(0, len(rows), chunk_size):
+        conn.execute(insert(model), rows[start:start + chunk_size])
+
+
+def _seed_students(task):
+    first_id, last_id, seed, chunk_size = task
+    engine.dispose(close=False)
+    rng = _rng(seed, "students", first_id)
+    students = []
+    for student_id in range(first_id, last_id + 1):
+        gender = rng.choice(["Male", "Female"])
+        first_name = rng.choice(FIRST_MALE_NAMES if gender == "Male" else FIRST_FEMALE_NAMES)
+        students.append({
+            "StudentID": student_id,
+            "FullName": f"{rng.choice(LAST_NAMES)} {first_name}",
+            "Gender": gender,
+            "PhoneNumber": f"0{rng.randint(100000000, 999999999)}",
+        })
+    with engine.begin() as conn:
+        _insert_chunked(conn, Student, students, chunk_size)
+    return len(students)
+
+
+def _seed_rooms(task):
+    """Insert a slice of rooms with their contracts, service usages and invoices"""
+    first_room, last_room, options = task
+    engine.dispose(close=False)
+    seed = options["seed"]
+    room_types, first_bed, total_beds = _room_layout(options["rooms"], seed)
+    terms = _terms(options["terms"])
+    generations = options["generations"]
+    today = datetime.date.today()
+    rng = _rng(seed, "contracts", first_room)
+
+    rooms, contracts, invoices, usages = [], [], [], []
+    for room_id in range(first_room, last_room + 1):
+        room_type_id = room_types[room_id - 1]
+        max_occupancy = ROOM_TYPES[room_type_id - 1][2]
+        floor = (room_id // 20) + 1
+        rooms.append({
+            "RoomID": room_id,
+            "RoomTypeID": room_type_id,
+            "RoomNumber": f"{floor}{str(room_id % 20).zfill(2)}",
+            "MaxOccupancy": max_occupancy,
+            "Status": "Available",
+        })
+
+        # Each bed holds at most one contract per term and terms never overlap,
+        # so no room is ever above MaxOccupancy. A student only comes back
+        # every `generations` terms, so nobody has two overlapping contracts.
+        for bed in range(first_bed[room_id - 1], first_bed[room_id - 1] + max_occupancy):
+            for term_index, (term_start, term_end) in enumerate(terms):
+                if rng.random() >= options["occupancy"]:
+                    continue
+                slot = term_index * total_beds + bed
+                contract_id = slot + 1
+                contracts.append({
+                    "ContractID": contract_id,
+                    "StudentID": (term_index % generations) * total_beds + bed + 1,
+                    "RoomID": room_id,
+                    "StartDate": term_start,
+                    "EndDate": term_end,
+                })
+
+                # One invoice per elapsed month, totalling its service usages
+                for month in range(TERM_MONTHS):
+                    usage_date = _add_months(term_start, month)
+                    created_date = _add_months(usage_date, 1)
+                    if created_date > today:
+                        break
+                    invoice_id = slot * TERM_MONTHS + month + 1
+                    total = 0
+                    for service_index, (_, unit_price) in enumerate(SERVICES):
+                        if rng.random() >= 0.6:
+                            continue
+                        quantity = rng.randint(1, 5)
+                        total += unit_price * quantity
+                        usages.append({
+                            "ServiceUsageID": (invoice_id - 1) * len(SERVICES) + service_index + 1,
+                            "ContractID": contract_id,
+                            "InvoiceID": invoice_id,
+                            "ServiceID": service_index + 1,
+                            "Quantity": quantity,
+                            "UsageMonth": usage_date.month,
+                            "UsageYear": usage_date.year,
+                        })
+                    invoices.append({
+                        "InvoiceID": invoice_id,
+                        "CreatedDate": created_date,
+                        "DueDate": created_date + datetime.timedelta(days=15),
+                        "TotalAmount": round(total, 2),
+                    })
+
+    chunk_size = options["chunk_size"]
+    with engine.begin() as conn:
+        _insert_chunked(conn, Room, rooms, chunk_size)
+        _insert_chunked(conn, Contract, contracts, chunk_size)
+        _insert_chunked(conn, Invoice, invoices, chunk_size)
+        _insert_chunked(conn, ServiceUsage, usages, chunk_size)
+    return {"rooms": len(rooms), "contracts": len(contracts), "invoices": len(invoices), "service_usages": len(usages)}
+
+
+def _run(tasks, fn, workers: int):
+    if workers > 1:
+        with Pool(workers) as pool:
+            return pool.map(fn, tasks)
+    return [fn(task) for task in tasks]
+
+
+def seed_database(rooms: int = 100, terms: int = 4, generations: int = 2, occupancy: float = 0.8,
+                  seed: int = 42, chunk_size: int = 5000, workers: int = 1):
+    """
+    Wipe the dormitory tables and load a deterministic dataset.
+
+    The same arguments always produce the same rows. Every room has
+    `terms` six-month terms of contracts (the last one active today)
+    filled to `occupancy`, each contract gets one invoice per elapsed
+    month, and invoice totals equal the sum of their service usages.
+    """
+    # Wipe database first by dropping and recreating the seeded tables.
+    # Users and bootstrap bookkeeping are left untouched; archived rows are
+    # wiped too so their IDs cannot collide with the new ones, and occupancy
+    # snapshots because they describe the old contracts.
     print("Dropping all tables...")
-    Base.metadata.drop_all(bind=engine)
+    seeded_tables = [model.__table__ for model in (ServiceUsage, Invoice, Contract, Service, Student, Room, RoomType,
+                                                   ServiceUsageHistory, InvoiceHistory, ContractHistory,
+                                                   RoomOccupancySnapshot, RoomTypeOccupancySnapshot)]
+    Base.metadata.drop_all(bind=engine, tables=seeded_tables)
     print("Recreating all tables...")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=engine, tables=seeded_tables)
 
-    # Create a new database session
-    db: Session = SessionLocal()
+    with engine.begin() as conn:
+        conn.execute(insert(RoomType), [
+            {"RoomTypeID": i + 1, "RoomTypeName": name, "RentPrice": price}
+            for i, (name, price, _) in enumerate(ROOM_TYPES)
+        ])
+        conn.execute(insert(Service), [
+            {"ServiceID": i + 1, "ServiceName": name, "UnitPrice": price}
+            for i, (name, price) in enumerate(SERVICES)
+        ])
+    print("Room Types and Services seeded successfully")
 
-    try:
-        # Seed RoomTypes - keep this small
-        room_types = [
-            RoomType(RoomTypeName="Phòng đơn", RentPrice=850.00),
-            RoomType(RoomTypeName="Phòng đôi", RentPrice=850.00),
-            RoomType(RoomTypeName="Phòng 4 người", RentPrice=650.00),
-            RoomType(RoomTypeName="Phòng 8 người (không được nấu ăn)", RentPrice=400.00),
-            RoomType(RoomTypeName="Phòng 8 người (được nấu ăn)", RentPrice=450.00),
-        ]
-        room_type_occupancy = [1, 2, 4, 8, 8]
-        db.add_all(room_types)
-        db.flush()  # Flush to get the IDs
-        print("Room Types seeded successfully")
-
-        # Seed Rooms - around 100 records
-        rooms = []
-        for i in range(1, 101):
-            floor = (i // 20) + 1
-            room_number = f"{floor}{str(i % 20).zfill(2)}"
-            room_type_id = random.randint(1, len(room_types))
-            max_occupancy = room_type_occupancy[room_type_id - 1]
-            status = random.choice(["Available", "Full"])
-
-            rooms.append(Room(
-                RoomTypeID=room_type_id,
-                RoomNumber=room_number,
-                MaxOccupancy=max_occupancy,
-                Status=status
-            ))
-
-        db.add_all(rooms)
-        db.flush()
-        print("Rooms seeded successfully")
-
-        first_male_names = ["Anh", "Huy", "Tuấn", "Minh", "Long", "Sơn", "Bảo", "Khoa", "Khánh"]
-        first_female_names = ["Linh", "Phương", "Thảo", "Mai", "Hằng", "Trang", "Lan", "Ngọc"]
-
-        last_names = ["Nguyễn", "Lê", "Trần", "Hà", "Phạm", "Võ", "Vũ", "Phan", "Trương",
-                      "Bùi", "Đặng", "Châu", "Đỗ", "Ngô", "Dương", "Đinh", "Huỳnh"]
-
-        students = []
-        for i in range(1, 101):
-            gender = random.choice(["Male", "Female"])
-            if gender == "Male":
-                first_name = random.choice(first_male_names)
-            else:
-                first_name = random.choice(first_female_names)
-            last_name = random.choice(last_names)
-            full_name = f"{last_name} {first_name}"
-            phone_number = f"{random.randint(100, 999)}{random.randint(100, 999)}{random.randint(1000, 9999)}"
-
-            students.append(Student(
-                FullName=full_name,
-                Gender=gender,
-                PhoneNumber=phone_number
-            ))
-        db.add_all(students)
-        db.flush()
-        print("Students seeded successfully")
-
-        # Seed Contracts - around 100 records
-        # contracts = []
-        # for i in range(1, 101):
-        #     student_id = i  # One contract per student
-        #     room_id = random.randint(1, len(rooms))
-        #
-        #     # Random dates within a 2-year period
-        #     start_year = random.choice([2022, 2023])
-        #     start_month = random.randint(1, 12)
-        #     start_day = random.randint(1, 28)
-        #     start_date = datetime.date(start_year, start_month, start_day)
-        #
-        #     # Contract length between 3 months and 1 year
-        #     contract_length = random.randint(90, 365)
-        #     end_date = start_date + datetime.timedelta(days=contract_length)
-        #
-        #     contracts.append(Contract(
-        #         StudentID=student_id,
-        #         RoomID=room_id,
-        #         StartDate=start_date,
-        #         EndDate=end_date
-        #     ))
-        # db.add_all(contracts)
-        # db.flush()
-        # print("Contracts seeded successfully")
-
-        # Seed Services - keep this small
-        services = [
-            Service(ServiceName="Internet", UnitPrice=30.00),
-            Service(ServiceName="Laundry", UnitPrice=15.00),
-            Service(ServiceName="Cleaning", UnitPrice=50.00),
-            Service(ServiceName="Parking", UnitPrice=75.00),
-            Service(ServiceName="Utilities", UnitPrice=100.00),
-        ]
-        db.add_all(services)
-        db.flush()
-        print("Services seeded successfully")
-
-        # Seed Service Usages - around 100 records
-        # service_usages = []
-        # for i in range(1, 101):
-        #     contract_id = random.randint(1, len(contracts))
-        #     service_id = random.randint(1, len(services))
-        #     quantity = random.randint(1, 5)
-        #     usage_month = random.randint(1, 12)
-        #     usage_year = random.choice([2022, 2023])
-        #
-        #     service_usages.append(ServiceUsage(
-        #         ContractID=contract_id,
-        #         ServiceID=service_id,
-        #         Quantity=quantity,
-        #         UsageMonth=usage_month,
-        #         UsageYear=usage_year
-        #     ))
-        # db.add_all(service_usages)
-        # db.flush()
-        # print("Service Usages seeded successfully")
-
-        # Seed Invoices - around 100 records
-        # invoices = []
-        # for i in range(1, 101):
-        #     service_usage_id = i  # One invoice per service usage
-        #
-        #     # Create dates for invoices
-        #     year = random.choice([2022, 2023])
-        #     month = random.randint(1, 12)
-        #     day = random.randint(1, 28)
-        #     created_date = datetime.date(year, month, day)
-        #
-        #     # Due date is 30 days after created date
-        #     due_date = created_date + datetime.timedelta(days=30)
-        #
-        #     # Random amount between 100 and 1000
-        #     total_amount = round(random.uniform(100.00, 1000.00), 2)
-        #
-        #     invoices.append(Invoice(
-        #         ServiceUsageID=service_usage_id,
-        #         CreatedDate=created_date,
-        #         DueDate=due_date,
-        #         TotalAmount=total_amount
-        #     ))
-        # db.add_all(invoices)
-        # db.flush()
-        # print("Invoices seeded successfully")
-
-        # Commit all changes
-        db.commit()
-        print("All tables seeded successfully!")
+    _, _, total_beds = _room_layout(rooms, seed)
+    student_count = total_beds * generations
+    student_tasks = [
+        (first_id, min(first_id + chunk_size - 1, student_count), seed, chunk_size)
+        for first_id in range(1, student_count + 1, chunk_size)
+    ]
+    _run(student_tasks, _seed_students, workers)
+    print(f"{student_count} Students seeded successfully")
 
-    except Exception as e:
-        db.rollback()
-        print(f"Error seeding database: {e}")
+    options = {"rooms": rooms, "terms": terms, "generations": generations, "occupancy": occupancy,
+               "seed": seed, "chunk_size": chunk_size}
+    room_tasks = [
+        (first_room, min(first_room + ROOMS_PER_TASK - 1, rooms), options)
+        for first_room in range(1, rooms + 1, ROOMS_PER_TASK)
+    ]
+    counts = {"students": student_count}
+    for result in _run(room_tasks, _seed_rooms, workers):
+        for key, value in result.items():
+            counts[key] = counts.get(key, 0) + value
+    print(f"Seeded {counts}")
 
+    # Dropping the tables also dropped their triggers, so re-apply them.
+    # This also recomputes every room status from the seeded contracts.
+    run_bootstrap(force=True)
+
+    # Let running workers know every cached list and ETag is stale
+    db = SessionLocal()
+    try:
+        bump_version(db, *(table.name for table in seeded_tables))
+        db.commit()
     finally:
         db.close()
+    print("All tables seeded successfully!")
+    return counts
 
 
 if __name__ == "__main__":
-    seed_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Wipe and seed the dormitory database")
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--terms", type=int, default=4, help="Six-month terms of contract history per bed")
+    parser.add_argument("--generations", type=int, default=2, help="Students per bed across terms")
+    parser.add_argument("--occupancy", type=float, default=0.8, help="Share of beds filled each term")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per INSERT batch")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    args = parser.parse_args()
+    seed_database(rooms=args.rooms, terms=args.terms, generations=args.generations, occupancy=args.occupancy,
+                  seed=args.seed, chunk_size=args.chunk_size, workers=args.workers)
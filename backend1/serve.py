@@ -0,0 +1,238 @@
+"""
+Production launcher: one master, N forked uvicorn workers.
+
+Usage (from backend1/):
+    python serve.py --workers 4 --port 8000 --max-requests 10000
+
+The master runs the once-per-cluster startup work (schema and trigger
+bootstrap, room status recompute, cache warmup), imports the app and only
+then forks, so workers share the loaded code and warm caches copy-on-write.
+All workers accept on one listening socket. A worker that served
+--max-requests requests (plus jitter) stops accepting, finishes the
+requests it already accepted and exits, and the master forks a fresh one.
+
+Signals to the master: SIGTERM/SIGINT stop all workers gracefully, SIGHUP
+replaces them one after another.
+"""
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+import uvicorn
+
+# Must be decided before any module creates a metric
+if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="dorm-metrics-")
+# The master does the bootstrap below; importing main must not repeat it
+os.environ["SKIP_STARTUP_BOOTSTRAP"] = "1"
+
+
+def _clear_metrics_dir(path: str):
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+def run_startup_tasks():
+    """Work that must happen once per deployment, not once per worker"""
+    from database import SessionLocal
+    from init_triggers import run_bootstrap
+    from utils import reference_cache
+    from utils.dashboard import get_summary
+    from utils.room_index import get_room_index
+    from utils.room_triggers import update_all_room_statuses
+    from utils.student_index import load_index
+
+    run_bootstrap()
+    db = SessionLocal()
+    try:
+        # Statuses drift as contracts start and end without a write
+        update_all_room_statuses(db)
+        print("Warming caches...")
+        reference_cache.get_roomtypes(db)
+        reference_cache.get_services(db)
+        get_room_index(db)
+        get_summary(db)
+        load_index()
+    finally:
+        db.close()
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+# How long an exiting worker waits for connections it accepted just before
+# it stopped listening to send their first request
+FRESH_CONNECTION_GRACE_SECONDS = 1.0
+
+
+class RecyclingServer(uvicorn.Server):
+    """
+    A uvicorn server that stops accepting before it starts to exit.
+
+    uvicorn notices the request limit or a SIGTERM on its next tick and
+    keeps accepting on the shared socket until shutdown, which then
+    closes every connection that has not sent a request yet, unanswered.
+    This server closes its listener first, lets those connections send
+    and finish their request, and only then runs the normal shutdown.
+    """
+
+    def __init__(self, config, max_requests: int = None):
+        super().__init__(config)
+        self.max_requests = max_requests
+        self.draining_since = None
+
+    async def on_tick(self, counter: int) -> bool:
+        exiting = await super().on_tick(counter)
+        if self.max_requests is not None and self.server_state.total_requests >= self.max_requests:
+            exiting = True
+        if not exiting or self.force_exit:
+            return exiting
+        if self.draining_since is None:
+            self.draining_since = time.monotonic()
+            for server in self.servers:
+                server.close()
+        fresh = any(connection.cycle is None for connection in self.server_state.connections)
+        return not fresh or time.monotonic() - self.draining_since > FRESH_CONNECTION_GRACE_SECONDS
+
+
+def run_worker(app, sock: socket.socket, args):
+    """Child process body; never returns"""
+    from database import engine
+
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    # Connections opened by the master must not be shared with the workers
+    engine.dispose(close=False)
+    random.seed()
+
+    max_requests = None
+    if args.max_requests:
+        max_requests = args.max_requests + random.randint(0, args.max_requests_jitter)
+    config = uvicorn.Config(
+        app,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        timeout_keep_alive=args.keep_alive,
+        access_log=args.access_log,
+    )
+    code = 0
+    try:
+        RecyclingServer(config, max_requests).run(sockets=[sock])
+    except Exception as e:
+        print(f"Worker {os.getpid()} crashed: {e}")
+        code = 1
+    finally:
+        sys.stdout.flush()
+        os._exit(code)
+
+
+class Master:
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers = set()
+        self.stopping = False
+        self.replace = []
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.app, self.sock, self.args)
+        self.workers.add(pid)
+        print(f"Started worker {pid}")
+
+    def reap(self):
+        from prometheus_client import multiprocess
+
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.workers.discard(pid)
+            multiprocess.mark_process_dead(pid)
+            if not self.stopping:
+                if os.waitstatus_to_exitcode(status) != 0:
+                    # Do not spin if workers die at startup
+                    time.sleep(1)
+                self.spawn()
+
+    def stop(self, *_):
+        self.stopping = True
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGTERM)
+
+    def reload(self, *_):
+        self.replace = list(self.workers)
+
+    def _signal(self, pid: int, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.workers.discard(pid)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.reload)
+        for _ in range(self.args.workers):
+            self.spawn()
+
+        deadline = None
+        while self.workers:
+            self.reap()
+            if self.replace and not self.stopping and len(self.workers) >= self.args.workers:
+                # Recycle one worker at a time; reap() forks its replacement
+                self._signal(self.replace.pop(), signal.SIGTERM)
+            if self.stopping:
+                deadline = deadline or time.monotonic() + self.args.graceful_timeout + 5
+                if time.monotonic() > deadline:
+                    for pid in list(self.workers):
+                        self._signal(pid, signal.SIGKILL)
+            time.sleep(0.2)
+        print("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with preforked uvicorn workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-requests", type=int, default=0, help="Recycle a worker after this many requests (0: never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=0, help="Random extra requests per worker")
+    parser.add_argument("--graceful-timeout", type=int, default=30, help="Seconds to finish in-flight requests")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--skip-startup-tasks", action="store_true", help="Skip bootstrap and cache warmup")
+    args = parser.parse_args()
+
+    _clear_metrics_dir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    if not args.skip_startup_tasks:
+        run_startup_tasks()
+
+    from main import app
+
+    sock = bind_socket(args.host, args.port)
+    print(f"Listening on {args.host}:{args.port} with {args.workers} workers")
+    # Keep preloaded objects out of the collector so it does not touch their pages
+    gc.freeze()
+    Master(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
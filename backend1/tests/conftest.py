@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+
+# The app modules read DATABASE_URL on import; tests run on a scratch SQLite file
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="dorm-tests-"), "test.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import models.contract  # noqa: F401
+import models.room  # noqa: F401
+import models.roomtype  # noqa: F401
+import models.student  # noqa: F401
+from database import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,46 @@
+from datetime import date
+
+from sqlalchemy import select
+
+from crud.contract import _renewal_conflicts
+from models.contract import Contract
+from models.room import Room
+from models.roomtype import RoomType
+from models.student import Student
+
+
+def _select(db, *contract_ids):
+    return db.execute(
+        select(Contract.ContractID, Contract.StudentID, Contract.RoomID, Contract.StartDate, Contract.EndDate)
+        .where(Contract.ContractID.in_(contract_ids))
+    ).all()
+
+
+def _seed(db, *contracts, max_occupancy=4):
+    db.add(RoomType(RoomTypeID=1, RoomTypeName="Standard", RentPrice=100))
+    db.add(Room(RoomID=1, RoomTypeID=1, RoomNumber="101", MaxOccupancy=max_occupancy))
+    db.add_all(Student(StudentID=i, FullName=f"Student {i}", Gender="Male", PhoneNumber="0900000000") for i in (1, 2))
+    db.add_all(
+        Contract(ContractID=i, StudentID=student_id, RoomID=1, StartDate=start, EndDate=end)
+        for i, (student_id, start, end) in enumerate(contracts, start=1)
+    )
+    db.commit()
+
+
+def test_two_selected_contracts_of_one_student_conflict(db):
+    _seed(db, (1, date(2024, 1, 1), date(2024, 3, 31)), (1, date(2024, 4, 1), date(2024, 6, 30)))
+
+    conflicts, blocked = _renewal_conflicts(db, _select(db, 1, 2), date(2024, 12, 31))
+
+    assert blocked == {1, 2}
+    assert {(c["contract_id"], c["overlaps_contract_id"]) for c in conflicts} == {(1, 2), (2, 1)}
+
+
+def test_selected_contracts_of_different_students_renew(db):
+    _seed(db, (1, date(2024, 1, 1), date(2024, 3, 31)), (2, date(2024, 1, 1), date(2024, 6, 30)))
+
+    conflicts, blocked = _renewal_conflicts(db, _select(db, 1, 2), date(2024, 12, 31))
+
+    assert conflicts == []
+    assert blocked == set()
+
@@ -0,0 +1,148 @@
+import asyncio
+import os
+from collections import deque
+
+import anyio.to_thread
+from starlette.responses import JSONResponse
+
+from database import DB_POOL_SIZE, DB_MAX_OVERFLOW
+from utils.metrics import ADMISSION_REJECTIONS
+
+# Sync routes run on anyio's threadpool (40 threads by default). More threads
+# than database connections only moves the queue into the connection pool,
+# where requests wait up to the pool timeout while holding a thread.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1").lower() not in ("0", "false", "no")
+# How long an admitted-to-queue request may wait for a slot before it is shed
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2.0"))
+RETRY_AFTER_SECONDS = os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1")
+
+# Paths that are never queued or shed
+EXEMPT_PATHS = ("/", "/metrics")
+
+
+def _limits(route_class: str, concurrency: int, queue: int):
+    prefix = f"ADMISSION_{route_class.upper()}"
+    return int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))), int(os.getenv(f"{prefix}_QUEUE", str(queue)))
+
+
+# Thread shares of the classes. They add up to THREADPOOL_SIZE, so a request
+# let through by its gate always finds a free thread, and cheap reference
+# reads keep their share however many slow queries pile up elsewhere.
+_CHEAP_THREADS = max(1, THREADPOOL_SIZE // 4)
+_HEAVY_THREADS = max(1, min(2, THREADPOOL_SIZE // 6))
+_WRITE_THREADS = max(1, (THREADPOOL_SIZE - _CHEAP_THREADS - _HEAVY_THREADS) // 3)
+_READ_THREADS = max(1, THREADPOOL_SIZE - _CHEAP_THREADS - _HEAVY_THREADS - _WRITE_THREADS)
+
+# route class -> (requests running at once, requests allowed to wait).
+# Heavy work (exports, reports, bulk writes) is held to a few slots.
+ROUTE_CLASS_LIMITS = {
+    "cheap": _limits("cheap", _CHEAP_THREADS, THREADPOOL_SIZE * 4),
+    "read": _limits("read", _READ_THREADS, THREADPOOL_SIZE * 2),
+    "write": _limits("write", _WRITE_THREADS, THREADPOOL_SIZE),
+    "heavy": _limits("heavy", _HEAVY_THREADS, 4),
+}
+
+if ADMISSION_CONTROL and sum(concurrency for concurrency, _ in ROUTE_CLASS_LIMITS.values()) > THREADPOOL_SIZE:
+    raise ValueError(
+        f"Admission concurrency limits {ROUTE_CLASS_LIMITS} add up to more than THREADPOOL_SIZE={THREADPOOL_SIZE}; "
+        "lower them or raise THREADPOOL_SIZE (at least 4)"
+    )
+
+CHEAP_PREFIXES = ("/roomtypes", "/services", "/dashboard", "/auth/me")
+HEAVY_PREFIXES = ("/reports", "/internal")
+HEAVY_PATHS = ("/contracts/renew", "/contracts/transfer", "/contracts/status")
+
+
+def route_class(method: str, path: str) -> str:
+    if path.endswith("/export/excel") or path.startswith(HEAVY_PREFIXES) or path.rstrip("/") in HEAVY_PATHS:
+        return "heavy"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "cheap" if path.startswith(CHEAP_PREFIXES) else "read"
+    return "write"
+
+
+def configure_threadpool():
+    """Size the sync-route threadpool; call once the event loop is running"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+
+class _Gate:
+    """
+    A concurrency limit with a bounded FIFO queue.
+
+    Only touched from the event loop thread, so plain counters suffice;
+    a released slot is handed straight to the oldest waiter.
+    """
+
+    def __init__(self, concurrency: int, queue: int):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.active = 0
+        self.waiters = deque()
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active < self.concurrency and not self.waiters:
+            self.active += 1
+            return True
+        if len(self.waiters) >= self.queue:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up, pass it on
+                self.release()
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                return False
+            raise
+
+    def release(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionControlMiddleware:
+    """
+    Cap in-flight requests per route class and shed the excess.
+
+    A request beyond its class limit waits in a short queue; when the
+    queue is full, or the wait exceeds ADMISSION_QUEUE_TIMEOUT_SECONDS, it
+    gets an immediate 503 with Retry-After instead of adding to the backlog.
+    """
+
+    def __init__(self, app, limits: dict = None, queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS):
+        self.app = app
+        self.gates = {name: _Gate(*limit) for name, limit in (limits or ROUTE_CLASS_LIMITS).items()}
+        self.queue_timeout = queue_timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_CONTROL or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        gate = self.gates[name]
+        if not await gate.acquire(self.queue_timeout):
+            ADMISSION_REJECTIONS.labels(name).inc()
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": RETRY_AFTER_SECONDS}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
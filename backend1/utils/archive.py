@@ -0,0 +1,207 @@
+import argparse
+import calendar
+import gzip
+from collections import defaultdict
+from datetime import date, datetime
+
+import orjson
+from sqlalchemy import column, delete, func, insert, select, table, text
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.contract import Contract
+from models.contracthistory import ContractHistory
+from models.invoice import Invoice
+from models.invoicehistory import InvoiceHistory
+from models.serviceusage import ServiceUsage
+from models.serviceusagehistory import ServiceUsageHistory
+from utils.data_version import bump_version
+from utils.room_triggers import room_status_triggers_suspended
+
+ARCHIVE_BATCH_SIZE = 1000
+
+# (hot table, history table, view over both)
+ARCHIVES = (
+    (Contract, ContractHistory, "ContractAll"),
+    (Invoice, InvoiceHistory, "InvoiceAll"),
+    (ServiceUsage, ServiceUsageHistory, "ServiceUsageAll"),
+)
+
+
+def archive_view(model):
+    """A selectable for the view over `model` and its history table"""
+    view = next(view for hot, _, view in ARCHIVES if hot is model)
+    return table(view, *(column(col.name) for col in model.__table__.columns))
+
+
+def create_archive_views(db: Session):
+    """(Re)create the views reports use to read hot and archived rows together"""
+    for model, history, view in ARCHIVES:
+        names = ", ".join(col.name for col in model.__table__.columns)
+        db.execute(text(f"DROP VIEW IF EXISTS {view}"))
+        db.execute(text(
+            f"CREATE VIEW {view} AS "
+            f"SELECT {names} FROM {model.__tablename__} "
+            f"UNION ALL SELECT {names} FROM {history.__tablename__}"
+        ))
+    db.commit()
+
+
+def _months_before(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 - months
+    year, month = month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _archivable_groups(db: Session, cutoff: date):
+    """
+    Contracts ended before `cutoff`, grouped with the invoices they share.
+
+    A group is archived whole or not at all, and only if every invoice in
+    it was due before the cutoff as well, so an invoice left in the hot
+    table never loses part of its service usages.
+    """
+    expired = set(db.execute(select(Contract.ContractID).where(Contract.EndDate < cutoff)).scalars())
+    touched = (
+        select(ServiceUsage.InvoiceID)
+        .join(Contract, Contract.ContractID == ServiceUsage.ContractID)
+        .where(Contract.EndDate < cutoff)
+    )
+    pairs = db.execute(
+        select(ServiceUsage.ContractID, ServiceUsage.InvoiceID).where(ServiceUsage.InvoiceID.in_(touched)).distinct()
+    ).all()
+    late_invoices = set(db.execute(
+        select(Invoice.InvoiceID).where(Invoice.InvoiceID.in_(touched), Invoice.DueDate >= cutoff)
+    ).scalars())
+
+    invoices_of, contracts_of = defaultdict(set), defaultdict(set)
+    for contract_id, invoice_id in pairs:
+        invoices_of[contract_id].add(invoice_id)
+        contracts_of[invoice_id].add(contract_id)
+
+    seen = set()
+    for start in sorted(expired):
+        if start in seen:
+            continue
+        seen.add(start)
+        contract_ids, invoice_ids, stack = set(), set(), [start]
+        while stack:
+            contract_id = stack.pop()
+            contract_ids.add(contract_id)
+            for invoice_id in invoices_of[contract_id] - invoice_ids:
+                invoice_ids.add(invoice_id)
+                for other in contracts_of[invoice_id] - seen:
+                    seen.add(other)
+                    stack.append(other)
+        if contract_ids <= expired and not invoice_ids & late_invoices:
+            yield contract_ids, invoice_ids
+
+
+def _archive_batch(db: Session, cutoff: date, contract_ids, invoice_ids):
+    """
+    Move one batch of groups into the history tables in one transaction.
+
+    Returns the moved rows per table, or None when the batch changed since
+    it was planned (a renewal, a new usage) and was left for the next run.
+    """
+    still_expired = db.execute(
+        select(Contract.ContractID)
+        .where(Contract.ContractID.in_(contract_ids), Contract.EndDate < cutoff)
+        .with_for_update()
+    ).all()
+    # Locking the invoices keeps new usages from being attached until commit
+    db.execute(select(Invoice.InvoiceID).where(Invoice.InvoiceID.in_(invoice_ids)).with_for_update()).all()
+    foreign_usages = db.execute(
+        select(func.count()).select_from(ServiceUsage)
+        .where(ServiceUsage.InvoiceID.in_(invoice_ids), ServiceUsage.ContractID.not_in(contract_ids))
+    ).scalar()
+    if len(still_expired) != len(contract_ids) or foreign_usages:
+        db.rollback()
+        return None
+
+    filters = {
+        Contract: Contract.ContractID.in_(contract_ids),
+        Invoice: Invoice.InvoiceID.in_(invoice_ids),
+        ServiceUsage: ServiceUsage.ContractID.in_(contract_ids),
+    }
+    archived_at = datetime.now()
+    moved = {}
+    for model, history, _ in ARCHIVES:
+        rows = [row._asdict() for row in db.execute(select(*model.__table__.columns).where(filters[model]))]
+        if rows:
+            db.execute(insert(history), [{**row, "ArchivedAt": archived_at} for row in rows])
+        moved[model.__tablename__] = rows
+
+    # Children first for the foreign keys. Archived contracts ended long ago,
+    # so deleting them cannot change a room status.
+    with room_status_triggers_suspended(db):
+        db.execute(delete(ServiceUsage).where(filters[ServiceUsage]))
+        db.execute(delete(Invoice).where(filters[Invoice]))
+        db.execute(delete(Contract).where(filters[Contract]))
+    bump_version(db, *moved)
+    db.commit()
+    return moved
+
+
+def archive_expired(months: int, batch_size: int = ARCHIVE_BATCH_SIZE, export_path: str = None):
+    """
+    Move contracts that ended more than `months` months ago, with their
+    service usages and invoices, into the history tables.
+
+    Batches commit separately so the hot tables are only locked briefly.
+    With `export_path`, the moved rows are also written as gzipped JSON
+    lines ({"table": ..., column: value, ...}) once their batch committed.
+    """
+    cutoff = _months_before(date.today(), months)
+    db = SessionLocal()
+    export = gzip.open(export_path, "ab") if export_path else None
+    totals = {model.__tablename__: 0 for model, _, _ in ARCHIVES}
+    skipped = 0
+    try:
+        groups = list(_archivable_groups(db, cutoff))
+        db.rollback()
+
+        def flush(contract_ids, invoice_ids):
+            nonlocal skipped
+            moved = _archive_batch(db, cutoff, contract_ids, invoice_ids)
+            if moved is None:
+                skipped += len(contract_ids)
+                return
+            for name, rows in moved.items():
+                totals[name] += len(rows)
+                if export:
+                    for row in rows:
+                        export.write(orjson.dumps({"table": name, **row}, default=str,
+                                                  option=orjson.OPT_APPEND_NEWLINE))
+
+        contract_ids, invoice_ids = [], []
+        for group_contracts, group_invoices in groups:
+            contract_ids.extend(group_contracts)
+            invoice_ids.extend(group_invoices)
+            if len(contract_ids) >= batch_size:
+                flush(contract_ids, invoice_ids)
+                contract_ids, invoice_ids = [], []
+        if contract_ids:
+            flush(contract_ids, invoice_ids)
+    except Exception as e:
+        db.rollback()
+        print(f"Error archiving contracts: {e}")
+        raise
+    finally:
+        db.close()
+        if export:
+            export.close()
+
+    print(f"Archived rows ended before {cutoff}: {totals}")
+    if skipped:
+        print(f"{skipped} contracts changed while archiving and were left for the next run")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old contracts, usages and invoices into history tables")
+    parser.add_argument("--months", type=int, default=12, help="Archive contracts that ended this many months ago")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Contracts per transaction")
+    parser.add_argument("--export", help="Also append the archived rows to this .jsonl.gz file")
+    args = parser.parse_args()
+    archive_expired(args.months, batch_size=args.batch_size, export_path=args.export)
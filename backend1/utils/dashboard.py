@@ -0,0 +1,131 @@
+import threading
+from datetime import date
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from models.contract import Contract
+from models.invoice import Invoice
+from models.room import Room
+from models.roomtype import RoomType
+from utils import reference_cache
+from utils.data_version import current_versions
+
+
+def _occupancy(db: Session, today: date) -> dict:
+    """Beds, occupants and free beds per room type, in one grouped query"""
+    active = (
+        select(Contract.RoomID, func.count().label("occupants"))
+        .where(Contract.StartDate <= today, Contract.EndDate >= today)
+        .group_by(Contract.RoomID)
+        .subquery()
+    )
+    occupants = func.coalesce(active.c.occupants, 0)
+    rows = db.execute(
+        select(
+            Room.RoomTypeID,
+            func.count().label("rooms"),
+            func.sum(Room.MaxOccupancy).label("beds"),
+            func.sum(occupants).label("occupants"),
+            # An overfilled room has no free beds, it does not cancel out free ones elsewhere
+            func.sum(case((occupants < Room.MaxOccupancy, Room.MaxOccupancy - occupants), else_=0)).label("free_beds"),
+        )
+        .outerjoin(active, active.c.RoomID == Room.RoomID)
+        .group_by(Room.RoomTypeID)
+        .order_by(Room.RoomTypeID)
+    ).all()
+
+    room_types = []
+    for row in rows:
+        room_type = reference_cache.get_roomtype(db, row.RoomTypeID)
+        room_types.append({
+            "room_type_id": row.RoomTypeID,
+            "room_type_name": room_type.RoomTypeName if room_type else None,
+            "rooms": row.rooms,
+            "beds": int(row.beds or 0),
+            "occupants": int(row.occupants or 0),
+            "free_beds": int(row.free_beds or 0),
+        })
+    beds = sum(item["beds"] for item in room_types)
+    occupied = sum(item["occupants"] for item in room_types)
+    return {
+        "total_beds": beds,
+        "active_contracts": occupied,
+        "free_beds": sum(item["free_beds"] for item in room_types),
+        "occupancy_rate": round(occupied / beds, 4) if beds else 0.0,
+        "room_types": room_types,
+    }
+
+
+def _invoices(db: Session, today: date) -> dict:
+    """Revenue invoiced this month and open amounts, in one pass over Invoice"""
+    month_start = today.replace(day=1)
+    this_month = (Invoice.CreatedDate >= month_start) & (Invoice.CreatedDate <= today)
+    overdue = Invoice.DueDate < today
+    row = db.execute(
+        select(
+            func.sum(case((this_month, Invoice.TotalAmount), else_=0)).label("revenue"),
+            func.sum(case((this_month, 1), else_=0)).label("invoices"),
+            func.sum(case((overdue, Invoice.TotalAmount), else_=0)).label("overdue_total"),
+            func.sum(case((overdue, 1), else_=0)).label("overdue_invoices"),
+            func.sum(case((overdue, 0), else_=Invoice.TotalAmount)).label("outstanding_total"),
+        )
+    ).one()
+    return {
+        "revenue_this_month": float(row.revenue or 0),
+        "invoices_this_month": int(row.invoices or 0),
+        "overdue_total": float(row.overdue_total or 0),
+        "overdue_invoices": int(row.overdue_invoices or 0),
+        "outstanding_total": float(row.outstanding_total or 0),
+    }
+
+
+# section -> (tables it is computed from, builder)
+SECTIONS = {
+    "occupancy": ((Room.__tablename__, Contract.__tablename__, RoomType.__tablename__), _occupancy),
+    "invoices": ((Invoice.__tablename__,), _invoices),
+}
+
+# section -> (key, data), key being today's date plus the table versions
+_snapshot = {}
+# Sections some request is rebuilding right now
+_building = set()
+_lock = threading.Lock()
+
+
+def _rebuild(db: Session, name: str, key, today: date, stale):
+    """Recompute one section outside the lock; concurrent readers keep the stale copy meanwhile"""
+    with _lock:
+        if stale is not None and name in _building:
+            return stale
+        _building.add(name)
+    try:
+        entry = (key, SECTIONS[name][1](db, today))
+        with _lock:
+            _snapshot[name] = entry
+        return entry
+    finally:
+        with _lock:
+            _building.discard(name)
+
+
+def get_summary(db: Session) -> dict:
+    """
+    The dashboard summary of this worker.
+
+    Each section is tagged with the versions of the tables it reads and
+    the date, so a contract write only recomputes the occupancy section,
+    an invoice or service usage write only the invoice one, and reads in
+    between cost no query at all. A section is recomputed whole rather
+    than patched per write: most writes come from other workers and are
+    only seen as a version change, and each section is one grouped query.
+    """
+    today = date.today()
+    summary = {"as_of": today}
+    for name, (tables, _) in SECTIONS.items():
+        key = (today, tuple(current_versions(*tables).values()))
+        entry = _snapshot.get(name)
+        if entry is None or entry[0] != key:
+            entry = _rebuild(db, name, key, today, entry)
+        summary.update(entry[1])
+    return summary
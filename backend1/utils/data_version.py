@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.dataversion import DataVersion
+
+# How long a worker trusts its copy of the versions before re-reading the
+# DataVersion table. Writes made by this worker are visible immediately;
+# writes made by other workers become visible within this delay.
+DATA_VERSION_POLL_SECONDS = float(os.getenv("DATA_VERSION_POLL_SECONDS", "1.0"))
+
+_versions = {}
+_refreshed_at = 0.0
+# Incremented on every local commit that bumped a version, so a refresh
+# that raced with such a commit is not trusted for a full poll interval
+_local_commits = 0
+_lock = threading.Lock()
+
+
+def bump_version(db: Session, *tables: str):
+    """
+    Mark tables changed by the caller's transaction.
+
+    Call this from every CRUD write before it commits. The versions are
+    incremented right after the commit in their own short transaction, so
+    concurrent writers of a table do not queue on its version row for the
+    length of their transactions. Readers see the new data no later than
+    the new version, which only costs them an extra reload.
+    """
+    db.info.setdefault("bumped_tables", set()).update(tables)
+
+
+def _increment(bind, tables):
+    # Always lock version rows in the same order so concurrent bumps queue
+    # up instead of deadlocking
+    with bind.begin() as conn:
+        for table in sorted(tables):
+            updated = conn.execute(
+                update(DataVersion).where(DataVersion.TableName == table).values(Version=DataVersion.Version + 1)
+            ).rowcount
+            if not updated:
+                conn.execute(insert(DataVersion).values(TableName=table, Version=1))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _committed_bumps(session):
+    if "bumped_tables" in session.info:
+        session.info["committed_tables"] = session.info.pop("bumped_tables")
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _expire_local_versions(session, transaction):
+    # Fires once the session gave its connection back, so the bump reuses
+    # it instead of needing a second one from a possibly exhausted pool
+    global _refreshed_at, _local_commits
+    if transaction.parent is not None:
+        return
+    tables = session.info.pop("committed_tables", None)
+    if not tables:
+        return
+    try:
+        _increment(session.get_bind(), tables)
+    except Exception as e:
+        # The data is committed; caches catch up on the next bump or their TTL
+        print(f"Error bumping data versions of {sorted(tables)}: {e}")
+    _local_commits += 1
+    _refreshed_at = 0.0
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_bumps(session):
+    session.info.pop("bumped_tables", None)
+
+
+def _refresh():
+    global _versions, _refreshed_at
+    commits_before = _local_commits
+    db = SessionLocal()
+    try:
+        rows = db.execute(select(DataVersion.TableName, DataVersion.Version)).all()
+    finally:
+        db.close()
+    _versions = {table: version for table, version in rows}
+    if _local_commits == commits_before:
+        _refreshed_at = time.monotonic()
+
+
+def current_versions(*tables: str) -> dict:
+    """Versions of the given tables, re-read at most every DATA_VERSION_POLL_SECONDS"""
+    if time.monotonic() - _refreshed_at >= DATA_VERSION_POLL_SECONDS:
+        with _lock:
+            if time.monotonic() - _refreshed_at >= DATA_VERSION_POLL_SECONDS:
+                _refresh()
+    return {table: _versions.get(table, 0) for table in tables}
+
+
+def make_etag(*tables: str) -> str:
+    versions = current_versions(*tables)
+    return '"' + ".".join(f"{table}-{version}" for table, version in versions.items()) + '"'
+
+
+def conditional_get(*tables: str):
+    """
+    Dependency for list endpoints that only depend on `tables`.
+
+    Answers a matching If-None-Match with 304 before the endpoint runs
+    any query, and otherwise returns the ETag to send with the response.
+    """
+    def dependency(request: Request) -> str:
+        etag = make_etag(*tables)
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return etag
+    return dependency
+
+
+def etag_headers(etag: str) -> dict:
+    # no-cache lets clients keep the body but makes them revalidate every time
+    return {"ETag": etag, "Cache-Control": "no-cache"}
@@ -0,0 +1,41 @@
+import random
+import time
+from functools import wraps
+
+from sqlalchemy.exc import DBAPIError
+
+from utils.metrics import DEADLOCK_RETRIES
+
+# MySQL ER_LOCK_DEADLOCK and ER_LOCK_WAIT_TIMEOUT; InnoDB rolls back the
+# whole transaction (or statement) and the client is expected to retry
+RETRYABLE_ERROR_CODES = {1213, 1205}
+
+
+def is_retryable(error: DBAPIError) -> bool:
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] in RETRYABLE_ERROR_CODES
+
+
+def retry_on_deadlock(attempts: int = 3, backoff: float = 0.05):
+    """
+    Re-run a crud write whose transaction died in a deadlock.
+
+    The decorated function must take the session as its first argument and
+    do all its reads and writes inside one transaction, so starting over
+    from a rollback is safe. Waits grow exponentially with jitter so the
+    transactions that collided do not collide again.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(db, *args, **kwargs):
+            for attempt in range(1, attempts + 1):
+                try:
+                    return fn(db, *args, **kwargs)
+                except DBAPIError as e:
+                    db.rollback()
+                    if not is_retryable(e) or attempt == attempts:
+                        raise
+                    DEADLOCK_RETRIES.labels(fn.__name__).inc()
+                    time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        return wrapper
+    return decorator
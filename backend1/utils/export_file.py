@@ -3,52 +3,39 @@ from fastapi.responses import FileResponse
 import os
 from tempfile import NamedTemporaryFile
 from sqlalchemy.orm import Session
+from utils.metrics import EXPORT_DURATION
 from crud import contract as crud_contract, invoice as crud_invoice, room as crud_room, service as crud_service, student as crud_student
 
-def export_contracts_to_excel(db: Session) -> FileResponse:
-    contracts, _ = crud_contract.get_contracts_with_count(db, skip=0, limit=10000)
-    df = pd.DataFrame(contracts)
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def _rows_to_excel(rows) -> str:
+    # Rows are plain tuples from a column projection, no ORM state to strip
+    df = pd.DataFrame([row._asdict() for row in rows])
     with NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
         df.to_excel(tmp.name, index=False)
-        tmp_path = tmp.name
-    return FileResponse(tmp_path, filename="contracts.xlsx", media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        return tmp.name
+
+def export_contracts_to_excel(db: Session) -> FileResponse:
+    with EXPORT_DURATION.labels("contracts").time():
+        tmp_path = _rows_to_excel(crud_contract.get_contracts_with_room_number(db))
+    return FileResponse(tmp_path, filename="contracts.xlsx", media_type=XLSX_MEDIA_TYPE)
 
 def export_invoices_to_excel(db: Session) -> FileResponse:
-    invoices = [i.__dict__ for i in crud_invoice.get_invoices(db)]
-    for inv in invoices:
-        inv.pop('_sa_instance_state', None)
-    df = pd.DataFrame(invoices)
-    with NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-        df.to_excel(tmp.name, index=False)
-        tmp_path = tmp.name
-    return FileResponse(tmp_path, filename="invoices.xlsx", media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    with EXPORT_DURATION.labels("invoices").time():
+        tmp_path = _rows_to_excel(crud_invoice.get_invoices(db))
+    return FileResponse(tmp_path, filename="invoices.xlsx", media_type=XLSX_MEDIA_TYPE)
 
 def export_rooms_to_excel(db: Session) -> FileResponse:
-    rooms = [r.__dict__ for r in crud_room.get_rooms(db)]
-    for room in rooms:
-        room.pop('_sa_instance_state', None)
-    df = pd.DataFrame(rooms)
-    with NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-        df.to_excel(tmp.name, index=False)
-        tmp_path = tmp.name
-    return FileResponse(tmp_path, filename="rooms.xlsx", media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    with EXPORT_DURATION.labels("rooms").time():
+        tmp_path = _rows_to_excel(crud_room.get_rooms(db))
+    return FileResponse(tmp_path, filename="rooms.xlsx", media_type=XLSX_MEDIA_TYPE)
 
 def export_services_to_excel(db: Session) -> FileResponse:
-    services = [s.__dict__ for s in crud_service.get_services(db)]
-    for service in services:
-        service.pop('_sa_instance_state', None)
-    df = pd.DataFrame(services)
-    with NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-        df.to_excel(tmp.name, index=False)
-        tmp_path = tmp.name
-    return FileResponse(tmp_path, filename="services.xlsx", media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    with EXPORT_DURATION.labels("services").time():
+        tmp_path = _rows_to_excel(crud_service.get_services(db))
+    return FileResponse(tmp_path, filename="services.xlsx", media_type=XLSX_MEDIA_TYPE)
 
 def export_students_to_excel(db: Session) -> FileResponse:
-    students = [s.__dict__ for s in crud_student.get_students(db)]
-    for student in students:
-        student.pop('_sa_instance_state', None)
-    df = pd.DataFrame(students)
-    with NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-        df.to_excel(tmp.name, index=False)
-        tmp_path = tmp.name
-    return FileResponse(tmp_path, filename="students.xlsx", media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    with EXPORT_DURATION.labels("students").time():
+        tmp_path = _rows_to_excel(crud_student.get_students(db))
+    return FileResponse(tmp_path, filename="students.xlsx", media_type=XLSX_MEDIA_TYPE)
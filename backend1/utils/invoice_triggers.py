@@ -1,9 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import func, select, text
 from models.invoice import Invoice
-from models.serviceusage import ServiceUsage
 from models.service import Service
+from models.serviceusage import ServiceUsage
 from fastapi import HTTPException, status
+from utils.metrics import INVOICE_RECALCULATIONS
+from utils.data_version import bump_version
 
 
 def create_invoice_triggers(db: Session):
@@ -75,6 +77,7 @@ def create_invoice_triggers(db: Session):
         raise
 
 def recalculate_invoice_amount(db: Session, invoice_id: int):
+    """Set the invoice total from its usages; the caller bumps the Invoice version and commits"""
     invoice = db.query(Invoice).filter(Invoice.InvoiceID == invoice_id).first()
     if not invoice:
         raise HTTPException(
@@ -82,18 +85,14 @@ def recalculate_invoice_amount(db: Session, invoice_id: int):
             detail="Invoice not found"
         )
 
-    # Lấy tất cả service usages liên quan
-    service_usages = db.query(ServiceUsage).filter(
-        ServiceUsage.InvoiceID == invoice.InvoiceID
-    ).all()
-
-    total = 0
-    for su in service_usages:
-        service = db.query(Service).filter(Service.ServiceID == su.ServiceID).first()
-        if service:
-            total += service.UnitPrice * su.Quantity
-
-    invoice.TotalAmount = total
+    # Tổng tiền tính trong SQL, cùng transaction, theo đơn giá hiện tại trong bảng Service
+    invoice.TotalAmount = db.execute(
+        select(func.coalesce(func.sum(Service.UnitPrice * ServiceUsage.Quantity), 0))
+        .select_from(ServiceUsage)
+        .join(Service, Service.ServiceID == ServiceUsage.ServiceID)
+        .where(ServiceUsage.InvoiceID == invoice.InvoiceID)
+    ).scalar()
+    INVOICE_RECALCULATIONS.inc()
     return invoice
 
 def recalculate_all_invoice_amounts(db: Session):
@@ -103,5 +102,6 @@ def recalculate_all_invoice_amounts(db: Session):
     for invoice in invoices:
         recalculate_invoice_amount(db, invoice.InvoiceID)
     
+    bump_version(db, Invoice.__tablename__)
     db.commit()
     print("All invoice amounts updated successfully")
@@ -0,0 +1,132 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+# When several worker processes serve the app, point PROMETHEUS_MULTIPROC_DIR
+# at an empty directory shared by all of them before they start; each worker
+# then writes its samples there and /metrics aggregates them.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured size of the database connection pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_connections_open",
+    "Database connections currently open",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out",
+    "Database connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+
+CONTRACTS_CREATED = Counter(
+    "dorm_contracts_created_total",
+    "Contracts created",
+)
+CAPACITY_REJECTIONS = Counter(
+    "dorm_capacity_rejections_total",
+    "Contract writes rejected because the room was full",
+)
+DEADLOCK_RETRIES = Counter(
+    "dorm_deadlock_retries_total",
+    "Transactions retried after a deadlock or lock wait timeout",
+    ["operation"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "http_requests_shed_total",
+    "Requests answered 503 by admission control",
+    ["route_class"],
+)
+INVOICE_RECALCULATIONS = Counter(
+    "dorm_invoice_recalculations_total",
+    "Invoice total recalculations",
+)
+EXPORT_DURATION = Histogram(
+    "dorm_export_duration_seconds",
+    "Time spent building Excel exports",
+    ["entity"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+def install_pool_metrics(engine):
+    """Track connection pool usage through pool events"""
+    DB_POOL_SIZE.set(engine.pool.size())
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        DB_POOL_OPEN.inc()
+
+    @event.listens_for(engine, "close")
+    def _on_close(dbapi_connection, connection_record):
+        DB_POOL_OPEN.dec()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+def render_metrics():
+    """Return the metrics payload and its content type"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Record latency and in-flight requests per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+            # Label by route template, never by raw path, to bound cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.labels(method, route, str(status_code)).observe(time.perf_counter() - started)
@@ -0,0 +1,75 @@
+import argparse
+from datetime import date, timedelta
+
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.contract import Contract
+from models.room import Room
+from models.roomoccupancysnapshot import RoomOccupancySnapshot
+from models.roomtypeoccupancysnapshot import RoomTypeOccupancySnapshot
+from utils.archive import archive_view
+
+
+def take_snapshot(db: Session, day: date):
+    """
+    (Re)write the occupancy rows of `day`; the caller commits.
+
+    Contracts are read through the archive view, so past days can be
+    backfilled after archiving. Rooms are not versioned: a backfilled day
+    uses today's room list, types and capacities.
+    """
+    contract = archive_view(Contract)
+    active = (
+        select(contract.c.RoomID, func.count().label("occupants"))
+        .where(contract.c.StartDate <= day, contract.c.EndDate >= day)
+        .group_by(contract.c.RoomID)
+        .subquery()
+    )
+    db.execute(delete(RoomOccupancySnapshot).where(RoomOccupancySnapshot.SnapshotDate == day))
+    db.execute(insert(RoomOccupancySnapshot).from_select(
+        ["SnapshotDate", "RoomID", "RoomTypeID", "Occupants", "MaxOccupancy"],
+        select(literal(day), Room.RoomID, Room.RoomTypeID, func.coalesce(active.c.occupants, 0), Room.MaxOccupancy)
+        .outerjoin(active, active.c.RoomID == Room.RoomID)
+    ))
+
+    rooms = RoomOccupancySnapshot
+    db.execute(delete(RoomTypeOccupancySnapshot).where(RoomTypeOccupancySnapshot.SnapshotDate == day))
+    db.execute(insert(RoomTypeOccupancySnapshot).from_select(
+        ["SnapshotDate", "RoomTypeID", "Rooms", "Beds", "Occupants", "FreeBeds"],
+        select(
+            rooms.SnapshotDate, rooms.RoomTypeID, func.count(), func.sum(rooms.MaxOccupancy), func.sum(rooms.Occupants),
+            func.sum(case((rooms.Occupants < rooms.MaxOccupancy, rooms.MaxOccupancy - rooms.Occupants), else_=0)),
+        )
+        .where(rooms.SnapshotDate == day)
+        .group_by(rooms.SnapshotDate, rooms.RoomTypeID)
+    ))
+
+
+def take_snapshots(date_from: date, date_to: date):
+    """Snapshot every day of the range, one transaction per day"""
+    db = SessionLocal()
+    try:
+        day = date_from
+        while day <= date_to:
+            take_snapshot(db, day)
+            db.commit()
+            day += timedelta(days=1)
+    except Exception as e:
+        db.rollback()
+        print(f"Error taking occupancy snapshot for {day}: {e}")
+        raise
+    finally:
+        db.close()
+    print(f"Occupancy snapshots written for {date_from} to {date_to}")
+
+
+if __name__ == "__main__":
+    # Meant to run daily, e.g. from cron shortly before midnight; re-running a day overwrites it
+    parser = argparse.ArgumentParser(description="Write daily room occupancy snapshots")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="First day (default: today)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="Last day (default: today)")
+    args = parser.parse_args()
+    today = date.today()
+    take_snapshots(args.date_from or args.date_to or today, args.date_to or today)
@@ -0,0 +1,78 @@
+import os
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from crud.helper import columns, fetch_rows
+from models.roomtype import RoomType
+from models.service import Service
+from utils.data_version import current_versions
+
+# Upper bound on how long a copy is served even when no version bump was
+# seen, e.g. after rows were edited directly in the database
+REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+
+_KEYS = {
+    RoomType.__tablename__: (RoomType, RoomType.RoomTypeID),
+    Service.__tablename__: (Service, Service.ServiceID),
+}
+
+# table -> (version, loaded_at, rows, rows_by_id)
+_entries = {}
+
+
+def _entry(db: Session, table: str):
+    """
+    The cached rows of a reference table, reloaded when stale.
+
+    An entry is tagged with the table version read before loading it, so a
+    write committed by any worker while the rows were being read only costs
+    one extra reload on the next call.
+    """
+    version = current_versions(table)[table]
+    entry = _entries.get(table)
+    if entry and entry[0] == version and time.monotonic() - entry[1] < REFERENCE_CACHE_TTL_SECONDS:
+        return entry
+
+    model, key = _KEYS[table]
+    rows = tuple(fetch_rows(db, select(*columns(model)).order_by(key)))
+    entry = (version, time.monotonic(), rows, {getattr(row, key.key): row for row in rows})
+    _entries[table] = entry
+    return entry
+
+
+def invalidate(*tables: str):
+    """Drop this worker's copy; other workers notice the version bump"""
+    for table in tables or tuple(_KEYS):
+        _entries.pop(table, None)
+
+
+def _get(db: Session, table: str, row_id: int):
+    """
+    One cached row, read from the database on a miss.
+
+    A row created by another worker is not in this worker's copy until
+    the next version poll, which must not look like a missing row.
+    """
+    row = _entry(db, table)[3].get(row_id)
+    if row is None:
+        model, key = _KEYS[table]
+        row = db.execute(select(*columns(model)).where(key == row_id)).first()
+    return row
+
+
+def get_roomtypes(db: Session):
+    return list(_entry(db, RoomType.__tablename__)[2])
+
+
+def get_roomtype(db: Session, roomtype_id: int):
+    return _get(db, RoomType.__tablename__, roomtype_id)
+
+
+def get_services(db: Session):
+    return list(_entry(db, Service.__tablename__)[2])
+
+
+def get_service(db: Session, service_id: int):
+    return _get(db, Service.__tablename__, service_id)
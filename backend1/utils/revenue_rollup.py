@@ -0,0 +1,137 @@
+from collections import defaultdict
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.contract import Contract
+from models.revenuerollup import RevenueRollup
+from models.room import Room
+from models.service import Service
+from models.serviceusage import ServiceUsage
+from utils.archive import archive_view
+
+# A cell of the rollup: (UsageYear, UsageMonth, ServiceID, RoomTypeID)
+KEY_COLUMNS = ("UsageYear", "UsageMonth", "ServiceID", "RoomTypeID")
+
+
+def _amount(quantity, service_id):
+    """`quantity` units at the service's current price, read by the statement itself"""
+    return quantity * select(Service.UnitPrice).where(Service.ServiceID == service_id).scalar_subquery()
+
+
+def _room_type_of(db: Session, contract_id: int):
+    return db.execute(
+        select(Room.RoomTypeID).join(Contract, Contract.RoomID == Room.RoomID).where(Contract.ContractID == contract_id)
+    ).scalar()
+
+
+def apply_deltas(db: Session, deltas: dict):
+    """
+    Add {cell: quantity} deltas to the rollup, inside the caller's
+    transaction.
+
+    Amounts are priced in SQL from the Service row, so they agree with
+    the price this transaction sees rather than a cached copy. Cells are
+    written in key order, so two transactions touching the same cells
+    queue up instead of deadlocking.
+    """
+    rows = [dict(zip(KEY_COLUMNS, key), Quantity=deltas[key]) for key in sorted(deltas) if deltas[key]]
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "mysql":
+        # One executemany upsert, applied in list order
+        stmt = mysql_insert(RevenueRollup).values(
+            **{name: bindparam(f"cell_{name}") for name in (*KEY_COLUMNS, "Quantity")},
+            Amount=_amount(bindparam("cell_Quantity"), bindparam("cell_ServiceID")),
+        )
+        db.execute(stmt.on_duplicate_key_update(
+            Quantity=RevenueRollup.Quantity + stmt.inserted.Quantity,
+            Amount=RevenueRollup.Amount + stmt.inserted.Amount,
+        ), [{f"cell_{name}": value for name, value in row.items()} for row in rows])
+        return
+    for row in rows:
+        amount = _amount(row["Quantity"], row["ServiceID"])
+        updated = db.execute(
+            update(RevenueRollup)
+            .where(*(getattr(RevenueRollup, name) == row[name] for name in KEY_COLUMNS))
+            .values(Quantity=RevenueRollup.Quantity + row["Quantity"], Amount=RevenueRollup.Amount + amount)
+        ).rowcount
+        if not updated:
+            db.execute(insert(RevenueRollup).values(**row, Amount=amount))
+
+
+def usage_deltas(db: Session, usage, sign: int = 1, deltas: dict = None) -> dict:
+    """
+    The rollup change of adding (sign=1) or removing (sign=-1) one usage.
+
+    `usage` is anything with ContractID, ServiceID, Quantity, UsageMonth
+    and UsageYear; pass the result of the removal as `deltas` to combine
+    both sides of an update.
+    """
+    deltas = defaultdict(int, deltas or {})
+    key = (usage.UsageYear, usage.UsageMonth, usage.ServiceID, _room_type_of(db, usage.ContractID))
+    deltas[key] += sign * usage.Quantity
+    return deltas
+
+
+def move_contracts(db: Session, room_types: dict):
+    """
+    Re-file the usages of contracts whose room type changed.
+
+    `room_types` maps ContractID -> (old RoomTypeID, new RoomTypeID).
+    """
+    moved = {contract_id: types for contract_id, types in room_types.items() if types[0] != types[1]}
+    if not moved:
+        return
+    usage = archive_view(ServiceUsage)
+    rows = db.execute(
+        select(usage.c.ContractID, usage.c.UsageYear, usage.c.UsageMonth, usage.c.ServiceID,
+               func.sum(usage.c.Quantity).label("Quantity"))
+        .where(usage.c.ContractID.in_(moved))
+        .group_by(usage.c.ContractID, usage.c.UsageYear, usage.c.UsageMonth, usage.c.ServiceID)
+    ).all()
+    deltas = defaultdict(int)
+    for row in rows:
+        old_type, new_type = moved[row.ContractID]
+        deltas[(row.UsageYear, row.UsageMonth, row.ServiceID, old_type)] -= row.Quantity
+        deltas[(row.UsageYear, row.UsageMonth, row.ServiceID, new_type)] += row.Quantity
+    apply_deltas(db, deltas)
+
+
+def reprice_service(db: Session, service_id: int, old_price, new_price):
+    """Amounts follow the current unit price, like invoice totals do"""
+    if old_price == new_price:
+        return
+    # Priced in SQL, the stored price is a Decimal and the new one may be a float
+    db.execute(
+        update(RevenueRollup)
+        .where(RevenueRollup.ServiceID == service_id)
+        .values(Amount=RevenueRollup.Amount + RevenueRollup.Quantity * new_price - RevenueRollup.Quantity * old_price)
+    )
+
+
+def rebuild_rollup(db: Session):
+    """Recompute the whole rollup from hot and archived usages; the caller commits"""
+    usage, contract = archive_view(ServiceUsage), archive_view(Contract)
+    keys = (usage.c.UsageYear, usage.c.UsageMonth, usage.c.ServiceID, Room.RoomTypeID)
+    totals = (
+        select(*keys, func.sum(usage.c.Quantity), func.sum(usage.c.Quantity * Service.UnitPrice))
+        .join(contract, contract.c.ContractID == usage.c.ContractID)
+        .join(Room, Room.RoomID == contract.c.RoomID)
+        .join(Service, Service.ServiceID == usage.c.ServiceID)
+        .group_by(*keys)
+    )
+    db.execute(delete(RevenueRollup))
+    db.execute(insert(RevenueRollup).from_select([*KEY_COLUMNS, "Quantity", "Amount"], totals))
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        rebuild_rollup(db)
+        db.commit()
+        print(f"Revenue rollup rebuilt: {db.query(RevenueRollup).count()} cells")
+    finally:
+        db.close()
@@ -0,0 +1,119 @@
+import threading
+from bisect import bisect_left
+from heapq import nsmallest
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from crud.helper import fetch_rows
+from models.room import Room
+from utils.data_version import current_versions
+
+# Substrings up to this length are indexed directly; longer queries are
+# narrowed with their first gram and then checked with `in`
+MAX_GRAM = 3
+
+
+class RoomIndex:
+    """
+    Read-only autocomplete index over room numbers.
+
+    Prefix matches come from a sorted array of lower-cased numbers, other
+    substring matches from a map of every 1..MAX_GRAM character gram to
+    the rooms containing it.
+    """
+
+    def __init__(self, version: int, rows):
+        self.version = version
+        self.rooms = {row.RoomID: (row.RoomNumber, row.RoomTypeID) for row in rows}
+        self.statuses = {row.RoomID: row.Status for row in rows}
+        self.sorted_numbers = sorted((number.lower(), room_id) for room_id, (number, _) in self.rooms.items())
+        self.keys = [number for number, _ in self.sorted_numbers]
+        self.grams = {}
+        for number, room_id in self.sorted_numbers:
+            for start in range(len(number)):
+                for end in range(start + 1, min(start + MAX_GRAM, len(number)) + 1):
+                    self.grams.setdefault(number[start:end], set()).add(room_id)
+
+    def with_statuses(self, version: int, rows):
+        """A copy sharing the number index, for when only room statuses changed"""
+        index = object.__new__(RoomIndex)
+        index.__dict__.update(self.__dict__)
+        index.version = version
+        index.statuses = {row.RoomID: row.Status for row in rows}
+        return index
+
+    def has_layout(self, rows) -> bool:
+        return len(rows) == len(self.rooms) and all(
+            self.rooms.get(row.RoomID) == (row.RoomNumber, row.RoomTypeID) for row in rows
+        )
+
+    def _result(self, room_id: int) -> dict:
+        number, room_type_id = self.rooms[room_id]
+        return {"RoomID": room_id, "RoomNumber": number, "RoomTypeID": room_type_id,
+                "Status": self.statuses[room_id]}
+
+    def search(self, q: str, limit: int = None, room_type_id: int = None, status: str = None):
+        """
+        Rooms whose number contains `q` (case-insensitive), best match first.
+
+        Ranking: exact match, then prefix matches in number order, then
+        other matches by position of `q`, length and number.
+        """
+        q = q.strip().lower()
+
+        def wanted(room_id):
+            return ((room_type_id is None or self.rooms[room_id][1] == room_type_id)
+                    and (status is None or self.statuses[room_id] == status))
+
+        results = []
+        for position in range(bisect_left(self.keys, q), len(self.keys)):
+            if not self.keys[position].startswith(q):
+                break
+            room_id = self.sorted_numbers[position][1]
+            if wanted(room_id):
+                results.append(room_id)
+                if limit is not None and len(results) >= limit:
+                    return [self._result(room_id) for room_id in results]
+        if not q:
+            return [self._result(room_id) for room_id in results]
+
+        # Prefix matches are done, only rooms containing q further in remain
+        inner = []
+        for room_id in self.grams.get(q[:MAX_GRAM], ()):
+            number = self.rooms[room_id][0].lower()
+            position = number.find(q)
+            if position > 0 and wanted(room_id):
+                inner.append((position, len(number), number, room_id))
+        ranked = sorted(inner) if limit is None else nsmallest(limit - len(results), inner)
+        results.extend(room_id for _, _, _, room_id in ranked)
+        return [self._result(room_id) for room_id in results]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_room_index(db: Session) -> RoomIndex:
+    """
+    The index for the current Room version.
+
+    Room writes, contract writes and status recalculations all bump the
+    Room version, so the index follows them within one version poll.
+    When only statuses changed the number index is reused as is.
+    """
+    global _index
+    version = current_versions(Room.__tablename__)[Room.__tablename__]
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        index = _index
+        if index is None or index.version != version:
+            rows = fetch_rows(db, select(Room.RoomID, Room.RoomNumber, Room.RoomTypeID, Room.Status))
+            if index is not None and index.has_layout(rows):
+                index = index.with_statuses(version, rows)
+            else:
+                index = RoomIndex(version, rows)
+            _index = index
+    return index
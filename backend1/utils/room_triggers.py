@@ -1,11 +1,13 @@
+from contextlib import contextmanager
 from datetime import date
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import case, func, select, text, update
 from models.room import Room
 from models.contract import Contract
 from fastapi import HTTPException, status
 from models.student import Student
+from utils.data_version import bump_version
 
 
 def create_room_triggers(db: Session):
@@ -31,24 +33,27 @@ def create_room_triggers(db: Session):
     BEGIN
         DECLARE current_occupancy INT;
         DECLARE max_occupancy INT;
+
+        -- Bulk operations set this and recompute room statuses once themselves
+        IF @skip_room_status_trigger IS NULL THEN
+            -- Get current occupancy count for the room
+            SELECT COUNT(*) INTO current_occupancy
+            FROM Contract 
+            WHERE RoomID = NEW.RoomID 
+            AND StartDate <= CURDATE()
+            AND EndDate >= CURDATE();
         
-        -- Get current occupancy count for the room
-        SELECT COUNT(*) INTO current_occupancy
-        FROM Contract 
-        WHERE RoomID = NEW.RoomID 
-        AND StartDate <= CURDATE()
-        AND EndDate >= CURDATE();
-        
-        -- Get max occupancy for the room
-        SELECT MaxOccupancy INTO max_occupancy
-        FROM Room 
-        WHERE RoomID = NEW.RoomID;
+            -- Get max occupancy for the room
+            SELECT MaxOccupancy INTO max_occupancy
+            FROM Room 
+            WHERE RoomID = NEW.RoomID;
         
-        -- Update room status based on occupancy
-        IF current_occupancy >= max_occupancy THEN
-            UPDATE Room SET Status = 'Full' WHERE RoomID = NEW.RoomID;
-        ELSE
-            UPDATE Room SET Status = 'Available' WHERE RoomID = NEW.RoomID;
+            -- Update room status based on occupancy
+            IF current_occupancy >= max_occupancy THEN
+                UPDATE Room SET Status = 'Full' WHERE RoomID = NEW.RoomID;
+            ELSE
+                UPDATE Room SET Status = 'Available' WHERE RoomID = NEW.RoomID;
+            END IF;
         END IF;
     END;
     """
@@ -61,24 +66,27 @@ def create_room_triggers(db: Session):
     BEGIN
         DECLARE current_occupancy INT;
         DECLARE max_occupancy INT;
+
+        -- Bulk operations set this and recompute room statuses once themselves
+        IF @skip_room_status_trigger IS NULL THEN
+            -- Get current occupancy count for the room
+            SELECT COUNT(*) INTO current_occupancy
+            FROM Contract 
+            WHERE RoomID = OLD.RoomID 
+            AND StartDate <= CURDATE()
+            AND EndDate >= CURDATE();
         
-        -- Get current occupancy count for the room
-        SELECT COUNT(*) INTO current_occupancy
-        FROM Contract 
-        WHERE RoomID = OLD.RoomID 
-        AND StartDate <= CURDATE()
-        AND EndDate >= CURDATE();
-        
-        -- Get max occupancy for the room
-        SELECT MaxOccupancy INTO max_occupancy
-        FROM Room 
-        WHERE RoomID = OLD.RoomID;
+            -- Get max occupancy for the room
+            SELECT MaxOccupancy INTO max_occupancy
+            FROM Room 
+            WHERE RoomID = OLD.RoomID;
         
-        -- Update room status based on occupancy
-        IF current_occupancy >= max_occupancy THEN
-            UPDATE Room SET Status = 'Full' WHERE RoomID = OLD.RoomID;
-        ELSE
-            UPDATE Room SET Status = 'Available' WHERE RoomID = OLD.RoomID;
+            -- Update room status based on occupancy
+            IF current_occupancy >= max_occupancy THEN
+                UPDATE Room SET Status = 'Full' WHERE RoomID = OLD.RoomID;
+            ELSE
+                UPDATE Room SET Status = 'Available' WHERE RoomID = OLD.RoomID;
+            END IF;
         END IF;
     END;
     """
@@ -91,43 +99,46 @@ def create_room_triggers(db: Session):
     BEGIN
         DECLARE current_occupancy INT;
         DECLARE max_occupancy INT;
+
+        -- Bulk operations set this and recompute room statuses once themselves
+        IF @skip_room_status_trigger IS NULL THEN
+            -- Update status for old room if room changed
+            IF OLD.RoomID != NEW.RoomID THEN
+                -- Update old room status
+                SELECT COUNT(*) INTO current_occupancy
+                FROM Contract 
+                WHERE RoomID = OLD.RoomID 
+                AND StartDate <= CURDATE()
+                AND EndDate >= CURDATE();
+            
+                SELECT MaxOccupancy INTO max_occupancy
+                FROM Room 
+                WHERE RoomID = OLD.RoomID;
+            
+                IF current_occupancy >= max_occupancy THEN
+                    UPDATE Room SET Status = 'Full' WHERE RoomID = OLD.RoomID;
+                ELSE
+                    UPDATE Room SET Status = 'Available' WHERE RoomID = OLD.RoomID;
+                END IF;
+            END IF;
         
-        -- Update status for old room if room changed
-        IF OLD.RoomID != NEW.RoomID THEN
-            -- Update old room status
+            -- Update status for new room
             SELECT COUNT(*) INTO current_occupancy
             FROM Contract 
-            WHERE RoomID = OLD.RoomID 
+            WHERE RoomID = NEW.RoomID 
             AND StartDate <= CURDATE()
             AND EndDate >= CURDATE();
-            
+        
             SELECT MaxOccupancy INTO max_occupancy
             FROM Room 
-            WHERE RoomID = OLD.RoomID;
-            
+            WHERE RoomID = NEW.RoomID;
+        
             IF current_occupancy >= max_occupancy THEN
-                UPDATE Room SET Status = 'Full' WHERE RoomID = OLD.RoomID;
+                UPDATE Room SET Status = 'Full' WHERE RoomID = NEW.RoomID;
             ELSE
-                UPDATE Room SET Status = 'Available' WHERE RoomID = OLD.RoomID;
+                UPDATE Room SET Status = 'Available' WHERE RoomID = NEW.RoomID;
             END IF;
         END IF;
-        
-        -- Update status for new room
-        SELECT COUNT(*) INTO current_occupancy
-        FROM Contract 
-        WHERE RoomID = NEW.RoomID 
-        AND StartDate <= CURDATE()
-        AND EndDate >= CURDATE();
-        
-        SELECT MaxOccupancy INTO max_occupancy
-        FROM Room 
-        WHERE RoomID = NEW.RoomID;
-        
-        IF current_occupancy >= max_occupancy THEN
-            UPDATE Room SET Status = 'Full' WHERE RoomID = NEW.RoomID;
-        ELSE
-            UPDATE Room SET Status = 'Available' WHERE RoomID = NEW.RoomID;
-        END IF;
     END;
     """
     
@@ -189,6 +200,41 @@ def check_room_availability(db: Session, room_id: int) -> bool:
     
     return active_contracts < room.MaxOccupancy
 
+def lock_room(db: Session, room_id: int):
+    """
+    Take a row lock on the room until the end of the transaction.
+
+    Every writer that adds students to a room goes through this, so they
+    queue up per room instead of all passing the capacity check at once.
+    """
+    room = db.execute(
+        select(Room.RoomID, Room.MaxOccupancy).where(Room.RoomID == room_id).with_for_update()
+    ).first()
+    if not room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found"
+        )
+    return room
+
+
+def reserve_room_capacity(db: Session, room_id: int) -> bool:
+    """
+    Lock the room and check it still has a free bed.
+
+    The count is a locking read, so it sees contracts committed by the
+    previous lock holder even if this transaction already has a snapshot.
+    """
+    room = lock_room(db, room_id)
+    active_contracts = db.execute(
+        select(func.count()).select_from(Contract).where(
+            Contract.RoomID == room_id,
+            Contract.StartDate <= func.curdate(),
+            Contract.EndDate >= func.curdate()
+        ).with_for_update(read=True)
+    ).scalar_one()
+    return active_contracts < room.MaxOccupancy
+
 def get_room_occupancy_info(db: Session, room_id: int):
     """Get current occupancy information for a room"""
     room = db.query(Room).filter(Room.RoomID == room_id).first()
@@ -215,22 +261,59 @@ def get_room_occupancy_info(db: Session, room_id: int):
         "is_available": active_contracts < room.MaxOccupancy
     }
 
+@contextmanager
+def room_status_triggers_suspended(db: Session):
+    """
+    Stop the contract triggers from recomputing room statuses row by row.
+
+    For set-based contract writes, which call update_room_statuses once
+    for the affected rooms instead. The flag is a MySQL session variable,
+    so it only affects the connection of this transaction.
+    """
+    connection = db.connection()
+    if connection.dialect.name != "mysql":
+        # The triggers only exist on MySQL
+        yield
+        return
+
+    connection.execute(text("SET @skip_room_status_trigger = 1"))
+    try:
+        yield
+    finally:
+        try:
+            connection.execute(text("SET @skip_room_status_trigger = NULL"))
+        except Exception:
+            # Never hand a connection with the triggers switched off back to the pool
+            connection.invalidate()
+            raise
+
+
+def update_room_statuses(db: Session, room_ids=None):
+    """
+    Recompute Status for the given rooms (all rooms if None) in one UPDATE.
+
+    Does not commit; the caller owns the transaction.
+    """
+    occupancy = select(func.count()).where(
+        Contract.RoomID == Room.RoomID,
+        Contract.StartDate <= func.curdate(),
+        Contract.EndDate >= func.curdate()
+    ).scalar_subquery()
+    stmt = update(Room).values(
+        Status=case((occupancy >= Room.MaxOccupancy, 'Full'), else_='Available')
+    ).execution_options(synchronize_session=False)
+    if room_ids is not None:
+        room_ids = list(room_ids)
+        if not room_ids:
+            return
+        stmt = stmt.where(Room.RoomID.in_(room_ids))
+    db.execute(stmt)
+    bump_version(db, Room.__tablename__)
+
+
 def update_all_room_statuses(db: Session):
     """Update status for all rooms based on current occupancy"""
-    rooms = db.query(Room).all()
-    
-    for room in rooms:
-        active_contracts = db.query(Contract).filter(
-            Contract.RoomID == room.RoomID,
-            Contract.StartDate <= text('CURDATE()'),
-            Contract.EndDate >= text('CURDATE()')
-        ).count()
-        
-        if active_contracts >= room.MaxOccupancy:
-            room.Status = 'Full'
-        else:
-            room.Status = 'Available'
-    
+    update_room_statuses(db)
     db.commit()
     print("All room statuses updated successfully")
 
@@ -260,6 +343,7 @@ def update_room_status_after_orm_change(db: Session, room_id: int):
         room.Status = 'Full'
     else:
         room.Status = 'Available'
+    bump_version(db, Room.__tablename__)
 
     # No need to commit here as this would typically be called
     # within a transaction that will be committed by the caller
@@ -0,0 +1,166 @@
+import asyncio
+import hmac
+import os
+import secrets
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import bcrypt
+import jwt
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.revokedtoken import RevokedToken
+from utils.data_version import bump_version, current_versions
+
+# When set, every data router requires a valid bearer token
+AUTH_REQUIRED = os.getenv("AUTH_REQUIRED", "").lower() in ("1", "true", "yes")
+
+# Without JWT_SECRET every process start signs with a fresh random key, so
+# tokens do not survive restarts and processes started separately reject
+# each other's tokens. Good enough for development, not when auth is enforced.
+if AUTH_REQUIRED and not os.getenv("JWT_SECRET"):
+    raise RuntimeError("AUTH_REQUIRED is set but JWT_SECRET is not; set JWT_SECRET to a shared signing key")
+JWT_SECRET = os.getenv("JWT_SECRET") or secrets.token_urlsafe(32)
+JWT_ALGORITHM = "HS256"
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so hashing runs truly parallel on these threads
+# while the request threadpool stays free for everything else
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+_hash_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+
+
+def is_password_hash(value: str) -> bool:
+    return value.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+# Checked when the username does not exist, so both cases take as long
+_dummy_hash = None
+
+
+def verify_password(password: str, stored: str = None) -> bool:
+    """
+    Check against a bcrypt hash, or a plaintext value left from before
+    hashing. stored=None (unknown user) costs a hash check and fails.
+    """
+    global _dummy_hash
+    if stored is None:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password("")
+        bcrypt.checkpw(password.encode(), _dummy_hash.encode())
+        return False
+    if is_password_hash(stored):
+        return bcrypt.checkpw(password.encode(), stored.encode())
+    return hmac.compare_digest(password.encode(), stored.encode())
+
+
+async def run_hashing(fn, *args):
+    """Run a bcrypt call on the bounded hashing pool; keep database work off it"""
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+
+
+def create_access_token(user_id: int, username: str):
+    """A signed token carrying everything routes need, and its lifetime in seconds"""
+    now = datetime.now(timezone.utc)
+    expires_in = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    claims = {
+        "sub": str(user_id),
+        "username": username,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + timedelta(seconds=expires_in),
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm=JWT_ALGORITHM), expires_in
+
+
+_revoked = set()
+_revoked_version = None
+_revoked_lock = threading.Lock()
+
+
+def _revoked_ids() -> set:
+    """
+    Revoked token IDs, reloaded only when the RevokedToken version moves,
+    so a logout in any worker applies everywhere within one version poll.
+    """
+    global _revoked, _revoked_version
+    version = current_versions(RevokedToken.__tablename__)[RevokedToken.__tablename__]
+    if version != _revoked_version:
+        with _revoked_lock:
+            if version != _revoked_version:
+                db = SessionLocal()
+                try:
+                    _revoked = set(db.execute(
+                        select(RevokedToken.TokenID).where(RevokedToken.ExpiresAt > datetime.now())
+                    ).scalars())
+                finally:
+                    db.close()
+                _revoked_version = version
+    return _revoked
+
+
+def decode_access_token(token: str, allow_expired: bool = False) -> dict:
+    """Verified claims of a token; allow_expired still checks the signature"""
+    try:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM],
+                            options={"require": ["exp", "sub", "jti"], "verify_exp": not allow_expired})
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    except jwt.InvalidTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    if claims["jti"] in _revoked_ids():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return claims
+
+
+def revoke_token(db: Session, claims: dict):
+    """Record a logout; expired revocations are pruned on the way"""
+    now = datetime.now()
+    db.execute(delete(RevokedToken).where(RevokedToken.ExpiresAt <= now))
+    expires_at = datetime.fromtimestamp(claims["exp"], timezone.utc).astimezone().replace(tzinfo=None)
+    db.merge(RevokedToken(TokenID=claims["jti"], ExpiresAt=expires_at))
+    bump_version(db, RevokedToken.__tablename__)
+    db.commit()
+    with _revoked_lock:
+        _revoked.add(claims["jti"])
+
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> dict:
+    """Claims of a valid bearer token; verified without reading the User table"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return decode_access_token(credentials.credentials)
+
+
+# Passed to include_router for every data router in main.py
+auth_dependencies = [Depends(get_current_user)] if AUTH_REQUIRED else []
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import event
+
+from utils.sql_instrumentation import fingerprint, get_current_stats
+
+SLOW_QUERY_LOG_PATH = os.getenv("SLOW_QUERY_LOG_PATH", "slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+
+# Recent slow queries and one plan per fingerprint, kept for /internal/slow-queries
+_recent = deque(maxlen=200)
+_plans = {}
+_plans_lock = threading.Lock()
+
+_logger = logging.getLogger("dorm.slow_query")
+
+
+def _redact(parameters):
+    """Keep the shape of the bound parameters but never their values"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _explain(cursor, statement, parameters):
+    """Run EXPLAIN on the same DBAPI connection, bypassing the engine events"""
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(f"EXPLAIN {statement}", parameters)
+        columns = [column[0] for column in explain_cursor.description]
+        return [dict(zip(columns, row)) for row in explain_cursor.fetchall()]
+    except Exception as e:
+        return [{"error": str(e)}]
+    finally:
+        explain_cursor.close()
+
+
+def _is_full_scan(plan) -> bool:
+    return any(row.get("type") in ("ALL", "index") for row in plan)
+
+
+def install_slow_query_log(engine, threshold_ms: float):
+    """Record statements slower than threshold_ms, with an EXPLAIN plan per fingerprint"""
+    if not _logger.handlers:
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG_PATH, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+
+    threshold = threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["slow_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("slow_query_start", None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        if duration < threshold:
+            return
+
+        statement_fingerprint = fingerprint(statement)
+        plan = None
+        with _plans_lock:
+            is_new = statement_fingerprint not in _plans
+            if is_new:
+                _plans[statement_fingerprint] = None
+        if is_new and not executemany and statement.lstrip().upper().startswith(_EXPLAINABLE):
+            plan = _explain(cursor, statement, parameters)
+            _plans[statement_fingerprint] = plan
+
+        stats = get_current_stats()
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(duration * 1000, 2),
+            "route": stats.route if stats else None,
+            "fingerprint": statement_fingerprint,
+            "parameters": _redact(parameters),
+            "full_scan": _is_full_scan(_plans.get(statement_fingerprint) or []),
+        }
+        _recent.append(entry)
+        # The plan is only written the first time a fingerprint is seen
+        _logger.info(json.dumps({**entry, "plan": plan} if plan else entry, default=str))
+
+
+def get_slow_queries():
+    """Slow queries recorded by this process, newest first, with their plans"""
+    recent = list(reversed(_recent))
+    return {
+        "recent": recent,
+        "plans": {
+            statement_fingerprint: plan
+            for statement_fingerprint, plan in _plans.items()
+            if plan is not None
+        },
+    }
@@ -0,0 +1,131 @@
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+# Flag a request when the same statement runs more than this many times
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+
+_current_stats: ContextVar = ContextVar("request_query_stats", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|:\w+)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so that calls differing only in literals compare equal"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+class RequestQueryStats:
+    """Queries issued while handling a single request"""
+
+    __slots__ = ("scope", "count", "db_time", "statements")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.count = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.db_time += duration
+        self.statements[fingerprint(statement)] += 1
+
+    @property
+    def route(self):
+        return _route_name(self.scope) if self.scope is not None else None
+
+    def repeated_statements(self, threshold: int = SQL_REPEAT_THRESHOLD):
+        return [(stmt, count) for stmt, count in self.statements.items() if count > threshold]
+
+
+def get_current_stats():
+    """Return the stats of the request being handled, or None outside a request"""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries():
+    """Collect query stats for a block of code outside of a request"""
+    stats = RequestQueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def install_sql_instrumentation(engine):
+    """Attach cursor-level timing hooks to the engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start_time"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_start_time", None)
+        if started is None:
+            return
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - started)
+
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", scope.get("path", ""))
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Count queries and DB time per request, expose them through a
+    Server-Timing header and report statements repeated in a loop.
+    """
+
+    def __init__(self, app, repeat_threshold: int = SQL_REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats(scope)
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            for statement, count in stats.repeated_statements(self.repeat_threshold):
+                print(
+                    f"Possible N+1: {scope['method']} {stats.route} ran the same statement "
+                    f"{count} times: {statement[:300]}"
+                )
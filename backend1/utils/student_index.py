@@ -0,0 +1,212 @@
+import threading
+import unicodedata
+from types import SimpleNamespace
+from bisect import bisect_left, insort
+from heapq import nsmallest
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from models.dataversion import DataVersion
+from models.student import Student
+from utils.data_version import current_versions
+
+# Query tokens shorter than this only match whole name tokens, so a single
+# letter does not union the posting lists of half the vocabulary
+MIN_PREFIX_LENGTH = 2
+
+
+def fold(text: str) -> str:
+    """Lower-case and strip Vietnamese diacritics: "Nguyễn Thảo" -> "nguyen thao" """
+    text = text.replace("đ", "d").replace("Đ", "d")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+class StudentIndex:
+    """
+    Inverted index over folded FullName tokens plus a sorted array of
+    phone numbers for prefix lookups.
+
+    `version` is the Student data version the contents correspond to.
+    Writes from this worker are applied in place and advance it by one,
+    exactly like the bump they made.
+    """
+
+    def __init__(self, version: int, rows):
+        self.version = version
+        self.students = {}
+        self.postings = {}
+        self.phones = []
+        for row in rows:
+            self._add(row.StudentID, row.FullName, row.Gender, row.PhoneNumber, bulk=True)
+        self.tokens = sorted(self.postings)
+        self.phones.sort()
+
+    def _add(self, student_id: int, full_name: str, gender: str, phone_number: str, bulk: bool = False):
+        name_tokens = frozenset(fold(full_name).split())
+        self.students[student_id] = (full_name, gender, phone_number, name_tokens, full_name.lower())
+        for token in name_tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                if not bulk:
+                    insort(self.tokens, token)
+            ids.add(student_id)
+        if bulk:
+            self.phones.append((phone_number, student_id))
+        else:
+            insort(self.phones, (phone_number, student_id))
+
+    def _remove(self, student_id: int):
+        entry = self.students.pop(student_id, None)
+        if entry is None:
+            return
+        _, _, phone_number, name_tokens, _ = entry
+        for token in name_tokens:
+            ids = self.postings[token]
+            ids.discard(student_id)
+            if not ids:
+                del self.postings[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+        position = bisect_left(self.phones, (phone_number, student_id))
+        if position < len(self.phones) and self.phones[position] == (phone_number, student_id):
+            del self.phones[position]
+
+    def apply(self, student_id: int, row=None):
+        """Replace (or with row=None, drop) one student"""
+        self._remove(student_id)
+        if row is not None:
+            self._add(student_id, row.FullName, row.Gender, row.PhoneNumber)
+
+    def _matching(self, token: str) -> set:
+        if len(token) < MIN_PREFIX_LENGTH:
+            return self.postings.get(token, set())
+        matches = set()
+        for position in range(bisect_left(self.tokens, token), len(self.tokens)):
+            if not self.tokens[position].startswith(token):
+                break
+            matches |= self.postings[self.tokens[position]]
+        return matches
+
+    def _result(self, student_id: int) -> dict:
+        full_name, gender, phone_number, _, _ = self.students[student_id]
+        return {"StudentID": student_id, "FullName": full_name, "Gender": gender, "PhoneNumber": phone_number}
+
+    def search(self, q: str, limit: int = 20):
+        """
+        Students matching every word of `q` by name-token prefix, or by
+        phone-number prefix when `q` is all digits.
+
+        Names are ranked by exact (accented) match of the query, then by
+        how many query words are whole name tokens, then by shortest name.
+        """
+        q = " ".join(q.split())
+        if not q:
+            return []
+        if q.replace(" ", "").isdigit():
+            digits = q.replace(" ", "")
+            results = []
+            for position in range(bisect_left(self.phones, (digits,)), len(self.phones)):
+                phone_number, student_id = self.phones[position]
+                if not phone_number.startswith(digits) or len(results) >= limit:
+                    break
+                results.append(self._result(student_id))
+            return results
+
+        query_tokens = fold(q).split()
+        candidates = None
+        for token in sorted(query_tokens, key=len, reverse=True):
+            matches = self._matching(token)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        lowered = q.lower()
+        students = self.students
+
+        def rank(student_id):
+            full_name, _, _, name_tokens, lower_name = students[student_id]
+            return (lowered not in lower_name, -len(name_tokens.intersection(query_tokens)),
+                    len(full_name), full_name, student_id)
+
+        return [self._result(student_id) for student_id in nsmallest(limit, candidates, key=rank)]
+
+
+_index = None
+_lock = threading.RLock()
+# Writes applied while a rebuild is reading the table, replayed onto its result
+_pending = None
+_rebuilding = False
+
+
+def _load():
+    """Read the Student version and rows in one transaction"""
+    db = SessionLocal()
+    try:
+        version = db.execute(
+            select(DataVersion.Version).where(DataVersion.TableName == Student.__tablename__)
+        ).scalar() or 0
+        rows = db.execute(select(Student.StudentID, Student.FullName, Student.Gender, Student.PhoneNumber)).all()
+    finally:
+        db.close()
+    return StudentIndex(version, rows)
+
+
+def _rebuild():
+    global _index, _pending, _rebuilding
+    try:
+        index = _load()
+        with _lock:
+            for student_id, row in _pending:
+                index.apply(student_id, row)
+            _index = index
+    except Exception as e:
+        print(f"Error rebuilding student search index: {e}")
+    finally:
+        with _lock:
+            _pending = None
+            _rebuilding = False
+
+
+def load_index():
+    """Build the index now rather than on the first search, e.g. before forking workers"""
+    global _index
+    with _lock:
+        if _index is None:
+            _index = _load()
+
+
+def search_students(q: str, limit: int = 20):
+    """
+    Search the index of this worker.
+
+    The first call builds the index synchronously. Afterwards, a write
+    seen only through the version poll (another worker, the seeder)
+    starts a background rebuild, and the current index keeps answering
+    until the new one is ready.
+    """
+    global _index, _pending, _rebuilding
+    with _lock:
+        if _index is None:
+            _index = _load()
+        version = current_versions(Student.__tablename__)[Student.__tablename__]
+        if version != _index.version and not _rebuilding:
+            _rebuilding = True
+            _pending = []
+            threading.Thread(target=_rebuild, name="student-index-rebuild", daemon=True).start()
+        return _index.search(q, limit)
+
+
+def student_changed(student_id: int, row=None):
+    """Apply a committed write from crud/student.py; row=None means deleted"""
+    if row is not None:
+        # Detach from the ORM instance so a replay never touches the session
+        row = SimpleNamespace(FullName=row.FullName, Gender=row.Gender, PhoneNumber=row.PhoneNumber)
+    with _lock:
+        if _index is None:
+            return
+        _index.apply(student_id, row)
+        _index.version += 1
+        if _pending is not None:
+            _pending.append((student_id, row))
@@ -4,6 +4,9 @@ export interface SuccessfulLogin {
   UserID: number;
   Username: string;
   message: string;
+  access_token: string;
+  token_type: string;
+  expires_in: number;
 }
 
 export async function login(username: string, password: string) {
@@ -132,7 +132,7 @@ export async function searchRooms(keyword: string) {
   try {
     const response = await fetch(
       import.meta.env.VITE_BACKEND_URL +
-        `/rooms/search/by-number?room_number=${encodeURIComponent(keyword)}`,
+        `/rooms/search/suggest?q=${encodeURIComponent(keyword)}&limit=20`,
       {
         method: "GET",
       },